@@ -160,9 +160,10 @@ def _gen_bgm_loop(sr=22050):
 class Audio:
     """จัดการ BGM และ SFX ทั้งหมด"""
 
-    def __init__(self):
-        self.sfx_on  = True
-        self.bgm_on  = True
+    def __init__(self, enabled=True):
+        """enabled=False — silent: no mixer, sounds or BGM (headless runs)"""
+        self.sfx_on  = enabled
+        self.bgm_on  = enabled
         self.sfx_vol = 0.65
         self.bgm_vol = 0.40
         self.on  = True           # alias สำหรับ backward compat
@@ -170,6 +171,7 @@ class Audio:
         self.sounds    = {}
         self.bgm_chan  = None
         self.bgm_sound = None
+        if not enabled: return
 
         try:
             pygame.mixer.init(22050, -16, 2, 1024)
@@ -0,0 +1,267 @@
+"""
+bench.py — micro-benchmarks สำหรับระบบที่กินเวลา CPU
+
+  python bench.py            รันทุกตัว
+  python bench.py terrain    รันเฉพาะชื่อที่ระบุ
+"""
+import sys
+import time
+
+
+def _timeit(fn, repeat=3):
+    """Best-of-N wall time in ms"""
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn()
+        dt = (time.perf_counter() - t0) * 1000
+        best = dt if best is None else min(best, dt)
+    return best
+
+
+def bench_terrain():
+    """Scalar vs numpy terrain generation — also checks both agree tile for tile."""
+    import world
+    if world.np is None:
+        print("terrain: numpy not installed — scalar path only")
+    for w, h in [(96, 72), (256, 256), (512, 512)]:
+        seed = 12345
+        ts = _timeit(lambda: world._gen_tiles_scalar(0, 0, w, h, seed), repeat=1)
+        line = f"terrain {w:>4}x{h:<4} scalar {ts:8.1f} ms"
+        if world.np is not None:
+            tv = _timeit(lambda: world._gen_tiles_np(0, 0, w, h, seed))
+            same = world._gen_tiles_np(0, 0, w, h, seed).tolist() == world._gen_tiles_scalar(0, 0, w, h, seed)
+            line += f"   numpy {tv:7.1f} ms   x{ts/tv:5.1f}   {'match' if same else 'MISMATCH'}"
+        print(line)
+
+
+def bench_world_cache():
+    """Full 256×256 world: generate vs reload from the on-disk chunk cache."""
+    import gc, tempfile
+    import world, worldcache
+    with tempfile.TemporaryDirectory() as d:
+        worldcache._default = worldcache.WorldCache(d)
+        def build(cache):
+            w = world.World(4242, 256, 256, cache=cache)
+            w.ensure(0, 0, 256, 256)
+        tg = _timeit(lambda: build(False), repeat=1)
+        build(True); gc.collect()                # fill the cache
+        th = _timeit(lambda: build(True))
+        gc.collect()
+        worldcache._default = None
+    print(f"world 256x256  generate {tg:7.1f} ms   cached {th:6.1f} ms   x{tg/th:5.1f}")
+
+
+def bench_particles():
+    """PS update+draw with a few thousand live particles (numpy and list columns)."""
+    import os, random
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame, entities
+    pygame.init()
+    surf = pygame.Surface((entities.SW, entities.SH))
+    def fill(n):
+        ps = entities.PS(emitters={"fx": (n, 0)}); random.seed(1)
+        for _ in range(n):
+            ps.add(random.uniform(0, entities.SW), random.uniform(0, entities.SH),
+                   random.uniform(-1, 1), random.uniform(-1, 1), (255, 160, 40), 60.0, 4, -0.04)
+        return ps
+    backends = [("numpy", entities.np), ("lists", None)] if entities.np is not None else [("lists", None)]
+    for name, mod in backends:
+        saved, entities.np = entities.np, mod
+        try:
+            for n in (150, 1000, 4000):
+                ps = fill(n)
+                tu = _timeit(lambda: ps.update(1/60))
+                td = _timeit(lambda: ps.draw(surf, 0, 0))
+                print(f"particles {name:5} {n:>5}   update {tu:6.2f} ms   draw {td:6.2f} ms")
+        finally:
+            entities.np = saved
+
+
+def bench_particle_budget():
+    """Flood every emitter: the pool must fill, and combat must evict ambient/fx first."""
+    import os, random
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import entities
+    backends = [("numpy", entities.np), ("lists", None)] if entities.np is not None else [("lists", None)]
+    for name, mod in backends:
+        saved, entities.np = entities.np, mod
+        try:
+            ps = entities.PS(); random.seed(2)
+            for em in ("ambient", "fx", "combat"):
+                for _ in range(4000):
+                    ps.add(random.uniform(0, 800), random.uniform(0, 600), 0, 0, (255, 160, 40), 5.0, emitter=em)
+            st = ps.stats()
+            print(f"particle budget {name:5}  " + "   ".join(
+                  f"{k} live {v['live']:4} dropped {v['dropped']:4} evicted {v['evicted']:4}" for k, v in st.items()))
+            assert len(ps) == ps.cap, "pool never filled"
+            assert st["ambient"]["evicted"] > 0 and st["combat"]["evicted"] == 0, "no priority eviction"
+            assert st["combat"]["live"] == ps.emitters["combat"].budget
+        finally:
+            entities.np = saved
+
+
+def bench_enemies():
+    """EnemyManager.update and grid queries for growing hordes around the player (numpy and list columns)."""
+    import math, random
+    import entities, world
+    w = world.World(77, cache=False)
+    tx, ty = w.nearest_walkable(*w.centre())
+    px, py = tx*world.TILE + 20, ty*world.TILE + 20
+    backends = [("numpy", entities.np), ("lists", None)] if entities.np is not None else [("lists", None)]
+    for name, mod in backends:
+        saved, entities.np = entities.np, mod
+        try:
+            for n in (20, 200, 800):
+                m = entities.EnemyManager(); random.seed(3)
+                for _ in range(n):
+                    a = random.uniform(0, math.pi*2); d = random.uniform(40, 600)
+                    m.spawn(random.choice(entities.ETYPE_IDS), px + math.cos(a)*d, py + math.sin(a)*d)
+                t = _timeit(lambda: m.update(px, py, w, 1/60), repeat=20)
+                tq = _timeit(lambda: m.in_radius(px, py, 90), repeat=50)
+                tv = _timeit(lambda: m.in_rect(px-500, py-350, px+500, py+350), repeat=50)
+                print(f"enemies {name:5} {n:>4}   update {t:6.2f} ms   attack query {tq*1000:6.1f} us   view {tv*1000:6.1f} us")
+        finally:
+            entities.np = saved
+
+
+def bench_enemy_draw():
+    """EnemyManager.draw (baked sprites, one blits call) for a screenful of enemies."""
+    import os, random
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame, entities
+    pygame.init()
+    surf = pygame.Surface((entities.SW, entities.SH))
+    for n in (10, 50, 200):
+        m = entities.EnemyManager(); random.seed(4)
+        for i in range(n):
+            e = m.spawn(random.choice(entities.ETYPE_IDS), random.uniform(0, entities.SW), random.uniform(0, entities.SH))
+            e.hp -= i % 3; e.anim = random.uniform(0, 2)
+        t = _timeit(lambda: m.draw(surf, 0, 0), repeat=20)
+        print(f"enemy draw {n:>4}   {t:6.2f} ms")
+
+
+def bench_nav():
+    """Hierarchical A* on a 1024×1024 map: queries before the graph is built,
+    the build piece by piece, uncached routes, leg-by-leg vs whole-path
+    refinement and cache hits."""
+    import random
+    import world, nav
+    w = world.World(4242, 1024, 1024, cache=False)
+    t0 = _timeit(lambda: w.ensure(0, 0, 1024, 1024), repeat=1)
+    g = nav.NavGraph(w)
+    random.seed(7)
+    pairs = [(w.nearest_walkable(random.randrange(1024), random.randrange(1024)),
+              w.nearest_walkable(random.randrange(1024), random.randrange(1024))) for _ in range(40)]
+    tl = _timeit(lambda: [g.walk(s, e) for s, e in pairs], repeat=1) / len(pairs)
+    assert not g.built, "a query built clusters"
+    pieces = []
+    while True:
+        t = time.perf_counter()
+        if not g.pump(1): break
+        pieces.append((time.perf_counter() - t) * 1000)
+    tb = sum(pieces)
+    pairs = [(s, e) for s, e in pairs if g.walk(s, e)]
+    top = sum(g.route(s, e)[1] for s, e in pairs)
+    tr = _timeit(lambda: [g.route(s, e) for s, e in pairs]) / len(pairs)
+    t1 = _timeit(lambda: [g._astar(s, e, g._links(g._cl(s), s), g._links(g._cl(e), e))
+                          for s, e in pairs]) / len(pairs)     # the same routes over transitions only
+    tc = _timeit(lambda: [g.walk(s, e) for s, e in pairs]) / len(pairs)
+    tf = _timeit(lambda: [g.walk(s, e).next() for s, e in pairs]) / len(pairs)
+    tp = _timeit(lambda: [g.path(s, e) for s, e in pairs]) / len(pairs)
+    n = sum(len(g.path(s, e)) for s, e in pairs) / len(pairs)
+    pieces.sort()
+    print(f"nav 1024x1024  world {t0:7.0f} ms   unbuilt query {tl*1000:6.1f} us   build {tb:7.0f} ms"
+          f" in {len(pieces)} pieces (p99 {pieces[len(pieces)*99//100]:5.2f} ms, worst {pieces[-1]:5.2f} ms)"
+          f"   {len(g.built)} clusters   {len(g.ports)} regions   {len(g.edges2)} ports")
+    print(f"nav per query  route {tr:6.2f} ms ({top}/{len(pairs)} over ports; transitions only {t1:5.2f} ms)"
+          f"   cached {tc*1000:6.1f} us   + first leg {tf*1000:6.1f} us   whole path refined {tp:6.2f} ms ({n:.0f} tiles)")
+
+
+def bench_nav_stream():
+    """Unbounded world walked far in one direction: the graph follows the
+    loaded chunks instead of growing with everything ever visited."""
+    import world, nav
+    from config import CHUNK, CHUNK_BUDGET, NAV_PUMP, TICK_RATE
+    w = world.World(4242, None, None, cache=False)
+    g = nav.NavGraph(w)
+    most = 0
+    for x in range(0, 4096, 4):                     # ~4 tiles a second, pumped every tick
+        w.stream(x - 80, -80, x + 80, 80)
+        g.pump(NAV_PUMP * TICK_RATE)
+        most = max(most, len(g._grid))
+    per = (CHUNK // g.k) ** 2
+    print(f"nav stream  {len(w.chunks)} chunks loaded   {len(g._grid)} cluster grids (most {most})"
+          f"   {len(g.built)} built   {len(g._dist)} tables   {len(g.ports)} regions")
+    assert most <= per * CHUNK_BUDGET, "cluster data outlives its chunks"
+    assert all(g._cl(u) in g._grid for u in g.edges), "graph nodes left in unloaded chunks"
+    assert all(g._cl(u) in g.built for u in g._dist) and all(g._rg(u) in g.ports for u in g._row)
+
+
+def bench_nav_repair():
+    """Wall a map in two, then chop one tree out of the wall: the route must come back."""
+    import world, nav
+    w = world.World(4242, 96, 72, cache=False)
+    w.ensure(0, 0, 96, 72)
+    g = nav.NavGraph(w); g.pump()
+    s, e = w.nearest_walkable(8, 36), w.nearest_walkable(88, 36)
+    p = g.path(s, e)
+    assert p is not None, "no route to start from"
+    wx = 40                                         # wall column, in neither end's cluster
+    gap = next(t for t in p if t[0] == wx)
+    tree = {"type": "tree", "hp": 5, "stage": 2}
+    for ty in range(72):
+        if w.walkable(wx, ty): w._put_obj((wx, ty), dict(tree))
+    assert g.path(s, e) is None and g.stats["waits"], "route through clusters being rebuilt"
+    g.pump()
+    assert g.path(s, e) is None, "wall does not cut the map"
+    assert g.path(s, e) is None                     # served from the cache
+    w.hit(*gap, power=99)                           # chop one tree out of the wall
+    g.pump()
+    fresh = nav.NavGraph(w); fresh.pump()
+    p2 = g.path(s, e); f2 = fresh.path(s, e)
+    print(f"nav repair  before {len(p)} tiles   walled None   reopened {p2 and len(p2)} tiles"
+          f"   fresh graph {f2 and len(f2)} tiles   {g.stats}")
+    assert p2 is not None and gap in p2, "stale unreachable route after the wall opened"
+
+
+def bench_sim():
+    """Headless game (sim.Sim): simulation steps per second with a scripted player."""
+    import os, tempfile
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as d:
+        os.chdir(d)                       # world cache / saves land in the temp dir
+        try:
+            import pygame
+            from sim import Sim
+            keys = [pygame.K_d, pygame.K_s, pygame.K_a, pygame.K_w]
+            def script(s):
+                s.release(); s.hold(keys[(s.ticks // 90) % 4])
+                if s.ticks % 20 == 0: s.act("attack")
+            s = Sim(seed=123, diff=0, script=script)
+            t = _timeit(lambda: s.step(3000), repeat=1); n = s.ticks
+            print(f"sim {n} steps   {t:7.0f} ms   {t/n:5.2f} ms/step   x{n/60/(t/1000):5.0f} real time"
+                  f"   ({len(s.game.enemies)} enemies, state {s.state})")
+        finally:
+            os.chdir(cwd)
+
+
+BENCHES = {
+    "terrain": bench_terrain,
+    "world_cache": bench_world_cache,
+    "particles": bench_particles,
+    "particle_budget": bench_particle_budget,
+    "enemies": bench_enemies,
+    "enemy_draw": bench_enemy_draw,
+    "nav": bench_nav,
+    "nav_stream": bench_nav_stream,
+    "nav_repair": bench_nav_repair,
+    "sim": bench_sim,
+}
+
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHES)
+    for n in names:
+        if n not in BENCHES:
+            print(f"unknown bench '{n}' — choose from: {', '.join(BENCHES)}"); continue
+        BENCHES[n]()
@@ -7,11 +7,37 @@ config.py — ค่าคงที่และข้อมูลเกมทั
 # ─────────────────────────────────────────────────────
 SW, SH   = 1280, 720
 TILE     = 40
-FPS      = 60
-FIXED_DT = 1.0 / FPS
+FPS      = 60               # display frame cap
+TICK_RATE = 60              # simulation steps per second (can be below FPS on weak machines)
+FIXED_DT = 1.0 / TICK_RATE
+MAX_STEPS = 5               # sim steps per frame at most — a longer stall is dropped, not caught up
 SAVE     = "fs_save.json"
 PROGRESS = "fs_progress.json"
 
+# ─────────────────────────────────────────────────────
+#  WORLD STREAMING
+# ─────────────────────────────────────────────────────
+WORLD_W, WORLD_H = 96, 72   # tiles — None, None = ไม่มีขอบแผนที่
+CHUNK        = 32           # tiles per chunk side (power of two)
+CHUNK_BUDGET = 48           # chunks kept in memory before far ones unload
+WORLD_CACHE  = "fs_world_cache"   # on-disk chunk cache directory
+WORLD_CACHE_MB = 32                # LRU cap for that directory
+FLOW_RADIUS  = 20           # tiles around the player covered by the chase flow field
+FLOW_PERIOD  = 0.25         # seconds between flow field rebuilds (at most)
+NAV_CLUSTER  = 16           # tiles per side of a hierarchical-pathfinding cluster
+NAV_CACHE    = 512          # cached routes kept by NavGraph
+NAV_REGION   = 4            # clusters per side of a NavGraph region (the top level)
+NAV_PUMP     = 2            # NavGraph pieces built per tick (a cluster, or one region port)
+SPATIAL_CELL = 128          # px per side of a spatial-hash cell (enemy queries)
+PREFETCH_AT  = 0.75         # mission progress at which the next stage starts building
+PARTICLE_CAP = 4096         # preallocated particle slots
+PARTICLE_BATCH = True       # baked sprites + one blits call (False = draw.circle each)
+PARTICLE_EMITTERS = {       # name: (budget, priority) — a full pool evicts lower priority first
+    "ambient": (3072, 0),   # campfire/torch fire, footsteps
+    "fx":      (1536, 1),   # heal, pickups, chop/mine debris
+    "combat":  (1536, 2),   # blood, kill bursts
+}                           # budgets add up past PARTICLE_CAP, so the pool can fill and evict
+
 # ─────────────────────────────────────────────────────
 #  COLOUR PALETTE
 # ─────────────────────────────────────────────────────
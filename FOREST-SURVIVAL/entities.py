@@ -1,61 +1,250 @@
 """
-entities.py — PS (Particle System), Enemy, Player
+entities.py — PS (Particle System), Enemy/EnemyManager, Player
 """
 import math
 import random
+from collections import deque
 import pygame
-from config import PAL, TILE, TWATER, TDEEP, SW, SH, WEAPON_DATA
+from config import PAL, TILE, TWATER, TDEEP, SW, SH, WEAPON_DATA, PARTICLE_CAP, PARTICLE_BATCH, PARTICLE_EMITTERS
+from spatial import SpatialHash
+from structures import Structures
+from farm import Farm
+from timers import TimerWheel
 
-class PS:   # Particle System
-    __slots__ = ("p",)
-    def __init__(self): self.p = []
+try:
+    import numpy as np
+except ImportError:     # numpy เป็น optional — ไม่มีก็ใช้ list columns
+    np = None
 
-    def add(self, x, y, vx, vy, col, life, sz=3, grav=0.04):
-        self.p.append([float(x),float(y),float(vx),float(vy),col,float(life),float(life),sz,grav])
+_X, _Y, _VX, _VY, _LIFE, _MAX, _SZ, _GRAV, _ADD = range(9)   # PS.f rows
+_prng = random.Random()   # particle jitter — kept off the gameplay random stream,
+                          # so what gets drawn (campfire/torch fire) never changes the run
 
-    def emit(self, x, y, col, n=6, spread=60, life=0.5, sz=4, up=False):
+# ── Particle sprites: colours are interned to ids so a sprite key is one int ──
+FADE_STEPS = 12          # fade levels baked per (colour, size)
+_PCOLS, _PCOL_ID = [], {}
+_psprites = {}           # key → (Surface, half-size)
+_KEY_BG = (255, 0, 255)  # colorkey of normal sprites (additive ones sit on black)
+
+def _colour_id(col):
+    col = tuple(col)
+    cid = _PCOL_ID.get(col)
+    if cid is None:
+        cid = _PCOL_ID[col] = len(_PCOLS); _PCOLS.append(col)
+    return cid
+
+def _pkey(add, cid, sz, b):
+    return (add << 20) | (cid << 8) | (min(sz, 15) << 4) | b
+
+def _bake_particle(key):
+    """Circle exactly as pygame.draw.circle would put it at the centre pixel"""
+    add, cid, sz, b = key >> 20, (key >> 8) & 0xfff, (key >> 4) & 15, key & 15
+    a = b / FADE_STEPS
+    r = max(1, int(sz * a))
+    col = tuple(min(255, int(c * a)) for c in _PCOLS[cid])
+    s = pygame.Surface((2*r + 2, 2*r + 2))
+    if not add:
+        s.fill(_KEY_BG); s.set_colorkey(_KEY_BG, pygame.RLEACCEL)
+    pygame.draw.circle(s, col, (r + 1, r + 1), r)
+    spr = _psprites[key] = (s, r + 1)
+    return spr
+
+
+class Emitter:
+    """Named particle source — its own budget, an eviction priority and counters"""
+    __slots__ = ("name", "eid", "budget", "priority", "spawned", "dropped", "evicted", "live")
+
+    def __init__(self, name, eid, budget, priority):
+        self.name, self.eid = name, eid
+        self.budget, self.priority = budget, priority
+        self.spawned = self.dropped = self.evicted = self.live = 0
+
+    def stats(self):
+        return {"live": self.live, "spawned": self.spawned,
+                "dropped": self.dropped, "evicted": self.evicted}
+
+
+class PS:   # Particle System — struct-of-arrays, fixed capacity
+    """Live particles sit packed in slots [0, n) of preallocated columns;
+    a dead slot is refilled from the tail (swap-remove), so nothing is
+    allocated per frame. Without numpy the columns are plain lists.
+    Every particle belongs to an emitter (PARTICLE_EMITTERS): an emitter past
+    its budget drops new particles, and a full pool evicts a particle of the
+    lowest-priority emitter below the one adding — the one nearest to dying,
+    popped from a per-emitter queue of rows that update() invalidates.
+    Drawing blits baked sprites in two batches: normal, then additive (fire)."""
+    __slots__ = ("cap", "n", "f", "ci", "em", "emitters", "_by_id", "_evict_order", "_rows")
+    batched = PARTICLE_BATCH   # False → one draw.circle per particle (reference look)
+
+    def __init__(self, cap=PARTICLE_CAP, emitters=PARTICLE_EMITTERS):
+        self.cap = cap; self.n = 0
+        self.emitters = {name: Emitter(name, i, b, p) for i, (name, (b, p)) in enumerate(emitters.items())}
+        self._by_id = list(self.emitters.values())
+        self._evict_order = sorted(self._by_id, key=lambda e: e.priority)
+        self._rows = None     # per emitter: deque of its rows, eviction order — None = stale
+        if np is not None:
+            self.f  = np.zeros((9, cap), np.float32)
+            self.ci = np.zeros(cap, np.int32)      # colour id
+            self.em = np.zeros(cap, np.int32)      # emitter id
+        else:
+            self.f  = [[0.0]*cap for _ in range(9)]
+            self.ci = [0]*cap
+            self.em = [0]*cap
+
+    def __len__(self): return self.n
+
+    @property
+    def dropped(self):
+        return sum(e.dropped for e in self._by_id)
+
+    def stats(self):
+        """{emitter name: {live, spawned, dropped, evicted}}"""
+        return {e.name: e.stats() for e in self._by_id}
+
+    def _queue_rows(self):
+        """Group live rows by emitter, least life left first — one sort per
+        update() at most; evictions and adds then keep the queues current"""
+        n = self.n
+        if np is not None:
+            order = np.lexsort((self.f[_LIFE, :n], self.em[:n])).tolist()
+        else:
+            L, em = self.f[_LIFE], self.em
+            order = sorted(range(n), key=lambda i: (em[i], L[i]))
+        rows, o = [], 0
+        for e in self._by_id:
+            rows.append(deque(order[o:o + e.live])); o += e.live
+        self._rows = rows
+
+    def _evict(self, priority):
+        """Free a slot held by the lowest-priority emitter below priority; -1 if none"""
+        for v in self._evict_order:
+            if v.priority >= priority: break
+            if v.live:
+                if self._rows is None: self._queue_rows()
+                v.live -= 1; v.evicted += 1
+                return self._rows[v.eid].popleft()
+        return -1
+
+    def add(self, x, y, vx, vy, col, life, sz=3, grav=0.04, maxlife=None, additive=False,
+            emitter="fx"):
+        e = self.emitters[emitter]
+        if e.live >= e.budget: e.dropped += 1; return
+        i = self.n
+        if i >= self.cap:
+            i = self._evict(e.priority)
+            if i < 0: e.dropped += 1; return
+        else:
+            self.n = i + 1
+        row = (x, y, vx, vy, life, maxlife or life, sz, grav, additive)
+        if np is not None: self.f[:, i] = row
+        else:
+            for c, v in zip(self.f, row): c[i] = v
+        self.ci[i] = _colour_id(col); self.em[i] = e.eid
+        e.live += 1; e.spawned += 1
+        if self._rows is not None: self._rows[e.eid].append(i)
+
+    def emit(self, x, y, col, n=6, spread=60, life=0.5, sz=4, up=False, emitter="fx"):
         for _ in range(n):
-            a = random.uniform(0, math.pi*2)
-            s = random.uniform(0.3,1.0)*spread/60
-            vy = s*math.sin(a) - (random.uniform(0.5,1.5) if up else 0)
-            self.p.append([float(x),float(y),s*math.cos(a),vy,col,
-                           life*random.uniform(0.7,1.3),life*random.uniform(0.7,1.3),sz,0.04])
+            a = _prng.uniform(0, math.pi*2)
+            s = _prng.uniform(0.3,1.0)*spread/60
+            vy = s*math.sin(a) - (_prng.uniform(0.5,1.5) if up else 0)
+            self.add(x, y, s*math.cos(a), vy, col,
+                     life*_prng.uniform(0.7,1.3), sz, 0.04, life*_prng.uniform(0.7,1.3),
+                     emitter=emitter)
 
     def blood(self, x, y, n=8):
         for _ in range(n):
-            a = random.uniform(0,math.pi*2)
-            s = random.uniform(0.5,2.5)
-            self.p.append([float(x),float(y),s*math.cos(a),s*math.sin(a)-0.5,
-                           PAL["blood"],random.uniform(0.25,0.45),0.4,random.randint(2,5),0.06])
+            a = _prng.uniform(0,math.pi*2)
+            s = _prng.uniform(0.5,2.5)
+            self.add(x, y, s*math.cos(a), s*math.sin(a)-0.5,
+                     PAL["blood"], _prng.uniform(0.25,0.45), _prng.randint(2,5), 0.06, 0.4,
+                     emitter="combat")
 
     def fire(self, x, y):
-        if len(self.p) > 150: return   # ไม่เพิ่ม fire ถ้า particle เต็มแล้ว
-        col = random.choice([PAL["orange"],(255,200,80),(220,80,20),(255,160,40)])
-        vx = random.uniform(-0.3,0.3)
-        vy = random.uniform(-1.4,-0.6)
-        self.p.append([float(x+random.uniform(-4,4)),float(y+random.uniform(-2,2)),
-                       vx,vy,col,random.uniform(0.25,0.5),0.45,random.randint(3,7),-0.04])
+        col = _prng.choice([PAL["orange"],(255,200,80),(220,80,20),(255,160,40)])
+        vx = _prng.uniform(-0.3,0.3)
+        vy = _prng.uniform(-1.4,-0.6)
+        self.add(x+_prng.uniform(-4,4), y+_prng.uniform(-2,2),
+                 vx, vy, col, _prng.uniform(0.25,0.5), _prng.randint(3,7), -0.04, 0.45, True,
+                 emitter="ambient")
 
     def heal(self, x, y):
         for _ in range(5):
-            self.add(x+random.uniform(-10,10), y+random.uniform(-10,10),
-                     random.uniform(-0.2,0.2), random.uniform(-1.2,-0.4),
-                     PAL["heal"], random.uniform(0.4,0.7), 4, -0.02)
+            self.add(x+_prng.uniform(-10,10), y+_prng.uniform(-10,10),
+                     _prng.uniform(-0.2,0.2), _prng.uniform(-1.2,-0.4),
+                     PAL["heal"], _prng.uniform(0.4,0.7), 4, -0.02, emitter="fx")
 
     def update(self, dt):
-        alive = []
-        for p in self.p:
-            p[0]+=p[2]*dt*60; p[1]+=p[3]*dt*60; p[3]+=p[8]*dt*60; p[5]-=dt
-            if p[5]>0: alive.append(p)
-        self.p = alive[-150:]  # cap at 150 particles
+        n = self.n
+        if not n: return
+        k = dt*60
+        if np is not None:
+            f = self.f[:, :n]
+            f[_X] += f[_VX]*k; f[_Y] += f[_VY]*k; f[_VY] += f[_GRAV]*k; f[_LIFE] -= dt
+            dead = np.flatnonzero(f[_LIFE] <= 0)
+            if len(dead) == 0: return
+            self._rows = None
+            for e, c in zip(self._by_id, np.bincount(self.em[dead], minlength=len(self._by_id)).tolist()):
+                e.live -= c
+            m = n - len(dead)
+            holes = dead[dead < m]                       # dead slots inside the kept range…
+            if len(holes):
+                tail = m + np.flatnonzero(f[_LIFE, m:] > 0)   # …refilled by live ones past it
+                self.f[:, holes] = self.f[:, tail]
+                self.ci[holes] = self.ci[tail]
+                self.em[holes] = self.em[tail]
+            self.n = m
+            return
+        X, Y, VX, VY, L = self.f[_X], self.f[_Y], self.f[_VX], self.f[_VY], self.f[_LIFE]
+        G = self.f[_GRAV]
+        for i in range(n):
+            X[i] += VX[i]*k; Y[i] += VY[i]*k; VY[i] += G[i]*k; L[i] -= dt
+        i = 0
+        while i < n:
+            if L[i] > 0: i += 1; continue
+            self._by_id[self.em[i]].live -= 1; self._rows = None
+            n -= 1                                       # swap-remove: last slot moves here
+            for c in self.f: c[i] = c[n]
+            self.ci[i] = self.ci[n]; self.em[i] = self.em[n]
+        self.n = n
 
     def draw(self, surf, cx, cy):
-        for p in self.p:
-            sx, sy = int(p[0]-cx), int(p[1]-cy)
+        n = self.n
+        if not n: return
+        if not self.batched: return self._draw_circles(surf, cx, cy)
+        if np is not None:
+            f = self.f[:, :n]
+            sx = (f[_X]-cx).astype(np.int32); sy = (f[_Y]-cy).astype(np.int32)
+            vis = np.flatnonzero((sx >= 0) & (sx < SW) & (sy >= 0) & (sy < SH))
+            a = np.clip(f[_LIFE, vis]/f[_MAX, vis], 0.0, 1.0)
+            keys = ((f[_ADD, vis].astype(np.int32) << 20) | (self.ci[vis] << 8)
+                    | (np.minimum(f[_SZ, vis], 15).astype(np.int32) << 4)
+                    | (a*FADE_STEPS + 0.5).astype(np.int32))
+            pts = zip(keys.tolist(), sx[vis].tolist(), sy[vis].tolist())
+        else:
+            F = self.f
+            pts = []
+            for i in range(n):
+                x, y = int(F[_X][i]-cx), int(F[_Y][i]-cy)
+                if not (0<=x<SW and 0<=y<SH): continue
+                a = min(1.0, max(0.0, F[_LIFE][i]/F[_MAX][i]))
+                pts.append((_pkey(int(F[_ADD][i]), self.ci[i], int(F[_SZ][i]), int(a*FADE_STEPS + 0.5)), x, y))
+        norm, add = [], []
+        get = _psprites.get
+        for k, x, y in pts:
+            s, h = get(k) or _bake_particle(k)
+            (add if k >> 20 else norm).append((s, (x-h, y-h)))
+        if norm: surf.blits(norm, False)
+        if add:  surf.blits([(s, p, None, pygame.BLEND_ADD) for s, p in add], False)
+
+    def _draw_circles(self, surf, cx, cy):
+        F = self.f
+        for i in range(self.n):
+            sx, sy = int(F[_X][i]-cx), int(F[_Y][i]-cy)
             if not (0<=sx<SW and 0<=sy<SH): continue
-            a = max(0.0, p[5]/p[6])
-            r,g,b = p[4]; sz = max(1, int(p[7]*a))
-            pygame.draw.circle(surf, (int(r*a),int(g*a),int(b*a)), (sx,sy), sz)
+            a = max(0.0, float(F[_LIFE][i]/F[_MAX][i]))
+            r,g,b = _PCOLS[int(self.ci[i])]; sz = max(1, int(F[_SZ][i]*a))
+            pygame.draw.circle(surf, (min(255,int(r*a)),min(255,int(g*a)),min(255,int(b*a))), (sx,sy), sz)
 
 # ─────────────────────────────────────────────────────
 #  ENEMIES
@@ -70,103 +259,447 @@ ETYPE = {
 }
 
 
+ETYPE_IDS = list(ETYPE)     # kind column value → etype
+
+# EnemyManager.f rows
+_EFIELDS = ("x", "y", "hp", "mhp", "atk", "spd", "sz", "acd", "flash", "ang",
+            "kbx", "kby", "poison", "anim", "ptx", "pty", "alert_r", "atk_r", "cell", "ox", "oy")
+(_EX, _EY, _EHP, _EMHP, _EATK, _ESPD, _ESZ, _EACD, _EFLASH, _EANG,
+ _EKBX, _EKBY, _EPOISON, _EANIM, _EPTX, _EPTY, _EALERT, _EATKR, _ECELL,
+ _EOX, _EOY) = range(len(_EFIELDS))   # ox/oy: position before the last update() (render interpolation)
+PATROL, CHASE = 0, 1
+
+
+def _ecol(r):
+    def get(self):
+        if self.i < 0: return self._snap[r]
+        return float(self.m.f[r, self.i]) if np is not None else self.m.f[r][self.i]
+    def set(self, v):
+        if self.i < 0: self._snap[r] = v
+        elif np is not None: self.m.f[r, self.i] = v
+        else: self.m.f[r][self.i] = v
+    return property(get, set)
+
+
+class EnemyProto:
+    """Per-type data shared (never copied) by every enemy of that type"""
+    __slots__ = ("etype", "kind", "name", "col", "xp", "drop", "sz", "row")
+
+    def __init__(self, etype):
+        d = ETYPE[etype]
+        self.etype, self.kind = etype, ETYPE_IDS.index(etype)
+        self.name, self.col, self.xp, self.drop = d["name"], d["col"], d["xp"], d["drop"]
+        self.sz = d["sz"]
+        # column template for a fresh spawn — x/y/hp/atk/patrol target filled in by spawn()
+        self.row = [0.0]*len(_EFIELDS)
+        self.row[_ESPD], self.row[_ESZ] = d["spd"], d["sz"]
+        self.row[_EALERT], self.row[_EATKR] = 210, 58
+
+EPROTO = {t: EnemyProto(t) for t in ETYPE_IDS}
+
+# ── Enemy sprites ── baked on first use, so drawing an enemy is a handful of blits
+_esprites = {}   # (kind, tint, bob) → (Surface, ox, oy)  shadow + body + outline
+_elabels  = {}   # kind → rendered name label
+_ebars    = {}   # sz → (background, hp, hp_low) strips
+_eeye     = []   # [eye Surface] once baked
+
+def _bake_enemy(key):
+    """Shadow + body at bob offset, drawn exactly as at (ox, oy) on screen.
+    tint bit 1 = hit flash, bit 2 = poisoned"""
+    kind, tint, bob = key
+    sz = EPROTO[ETYPE_IDS[kind]].sz
+    col = (255,90,90) if tint & 1 else EPROTO[ETYPE_IDS[kind]].col
+    if tint & 2: col = tuple(max(0,min(255,c+v)) for c,v in zip(col,(0,50,-20)))
+    ox, oy = sz+2, sz+3
+    s = pygame.Surface((2*sz+4, oy+sz+sz//2+4))
+    s.fill(_KEY_BG); s.set_colorkey(_KEY_BG, pygame.RLEACCEL)
+    pygame.draw.ellipse(s, PAL["shadow"], (ox-sz, oy+sz-6, sz*2, sz//2+4))
+    pygame.draw.circle(s, col, (ox, oy-bob), sz)
+    pygame.draw.circle(s, tuple(max(0,c-40) for c in col), (ox, oy-bob), sz, 2)
+    spr = _esprites[key] = (s, ox, oy)
+    return spr
+
+def _bake_bars(sz):
+    bw = sz*2+4; out = []
+    for col in ((40,15,15), PAL["hp"], PAL["hp_low"]):
+        s = pygame.Surface((bw, 6)); s.fill(_KEY_BG); s.set_colorkey(_KEY_BG, pygame.RLEACCEL)
+        pygame.draw.rect(s, col, (0,0,bw,6), border_radius=3)
+        out.append(s)
+    bars = _ebars[sz] = tuple(out)
+    return bars
+
+def _bake_label(kind):
+    if not Enemy._font:
+        Enemy._font = pygame.font.SysFont(None, 15)
+    t = _elabels[kind] = Enemy._font.render(EPROTO[ETYPE_IDS[kind]].name, True, (220,210,195))
+    return t
+
+def _enemy_blits(out, pr, sx, sy, ang, anim, flash, poison, hp, mhp):
+    """Append the blits for one enemy at screen position (sx, sy) to out"""
+    sx, sy = int(sx), int(sy)
+    if not (-60<sx<SW+60 and -60<sy<SH+60): return
+    bob = int(math.sin(anim*math.pi)*2); sz = pr.sz
+    key = (pr.kind, (flash > 0) | ((poison > 0) << 1), bob)
+    s, ox, oy = _esprites.get(key) or _bake_enemy(key)
+    out.append((s, (sx-ox, sy-oy)))
+    # Eyes follow direction
+    if not _eeye:
+        e = pygame.Surface((12, 12)); e.fill(_KEY_BG); e.set_colorkey(_KEY_BG, pygame.RLEACCEL)
+        pygame.draw.circle(e, (255,235,180), (6,6), 5); pygame.draw.circle(e, (200,0,0), (6,6), 3)
+        _eeye.append(e)
+    out.append((_eeye[0], (int(sx + sz*0.55*math.cos(ang)) - 6, int(sy - bob + sz*0.55*math.sin(ang)) - 6)))
+    # HP bar (only when damaged) — the strip clipped to the remaining hp
+    if hp < mhp:
+        bg, good, low = _ebars.get(sz) or _bake_bars(sz)
+        bx, by = sx-sz-2, sy-sz-bob-14; ratio = max(0, hp/mhp)
+        out.append((bg, (bx, by)))
+        out.append((good if ratio>0.4 else low, (bx, by), (0, 0, int((sz*2+4)*ratio), 6)))
+    # Name label
+    t = _elabels.get(pr.kind) or _bake_label(pr.kind)
+    out.append((t, (sx-t.get_width()//2, sy-sz-bob-28)))
+
+
 class Enemy:
+    """Handle to one row of an EnemyManager — attributes read/write its columns.
+    A removed enemy keeps a snapshot, so kill effects can still read x/y/xp;
+    its handle is pooled and reused by a later spawn (see EnemyManager)."""
+    __slots__ = ("m", "i", "proto", "_snap", "_snap_state")
     _font = None
 
-    def __init__(self, etype, x, y, diff_mult=1.0):
-        d = ETYPE[etype]; self.etype = etype
-        self.name = d["name"]
-        self.hp   = int(d["hp"]*diff_mult); self.mhp = self.hp
-        self.atk  = int(d["atk"]*diff_mult)
-        self.spd  = d["spd"]; self.sz = d["sz"]
-        self.col  = d["col"]; self.xp = d["xp"]
-        self.drop = d["drop"]
-        self.x = float(x); self.y = float(y)
-        self.state = "patrol"; self.ptarget = (x,y)
-        self.acd = 0; self.flash = 0; self.ang = 0
-        self.kbx = 0.0; self.kby = 0.0
-        self.poison = 0.0
-        self.alert_r = 210; self.atk_r = 58
-        self.anim = 0.0  # walk cycle
-
-    def update(self, px, py, world, dt):
-        self.acd  = max(0, self.acd-dt)
-        self.flash= max(0, self.flash-dt)
-        if self.poison > 0:
-            self.poison -= dt; self.hp -= dt*6
-            if self.hp <= 0: return "dead"
+    def __init__(self):
+        self.m, self.i, self.proto = None, -1, None
+        self._snap = [0.0]*len(_EFIELDS); self._snap_state = PATROL
+
+    @property
+    def etype(self): return self.proto.etype
+    @property
+    def name(self): return self.proto.name
+    @property
+    def col(self):  return self.proto.col
+    @property
+    def xp(self):   return self.proto.xp
+    @property
+    def drop(self): return self.proto.drop
+
+    @property
+    def state(self):
+        st = self._snap_state if self.i < 0 else int(self.m.state[self.i])
+        return "chase" if st == CHASE else "patrol"
+
+    @property
+    def ptarget(self): return (self.ptx, self.pty)
+
+    def draw(self, surf, cx, cy):
+        out = []
+        _enemy_blits(out, self.proto, self.x-cx, self.y-cy, self.ang, self.anim,
+                     self.flash, self.poison, self.hp, self.mhp)
+        if out: surf.blits(out, False)
+
+
+for _r, _n in enumerate(_EFIELDS): setattr(Enemy, _n, _ecol(_r))
+del _r, _n
+
+
+class EnemyManager:
+    """All live enemies as parallel columns, advanced together by update().
+
+    Rows [0, n) are live; removal swaps the last row in. Iterating yields
+    Enemy handles. Removed handles stay readable until the next update(),
+    then go to a pool that spawn() draws from before allocating.
+
+    Without numpy the columns are lists and update() runs the same rules
+    one row at a time. Handles are also filed in a SpatialHash (cell key
+    in the "cell" column), re-filed at the end of each update(), so
+    radius/rect queries touch only nearby cells."""
+
+    def __init__(self, cap=64):
+        self.cap = cap; self.n = 0
+        self.handles = []
+        self.routes  = []     # per row: nav.Route being patrolled, or None
+        self.grid    = SpatialHash()
+        self.pool    = []     # free handles for spawn()
+        self._freed  = []     # removed since the last update() — may still be read
+        self.stats   = {"spawned": 0, "reused": 0, "freed": 0}
+        # patrol randomness, seeded from the game's stream: one roll per patrolling
+        # row, then target offsets per re-targeted row, both in row order — so the
+        # numpy and list paths draw the same numbers and play the same game
+        self.roll    = random.Random(random.getrandbits(32))
+        self.pick    = random.Random(random.getrandbits(32))
+        if np is not None:
+            self.f     = np.zeros((len(_EFIELDS), cap))
+            self.kind  = np.zeros(cap, np.int8)
+            self.state = np.zeros(cap, np.int8)
+        else:
+            self.f     = [[0.0]*cap for _ in _EFIELDS]
+            self.kind  = [0]*cap
+            self.state = [0]*cap
+
+    def __len__(self):  return self.n
+    def __iter__(self): return iter(self.handles[:])
+    def __contains__(self, e): return e.m is self and e.i >= 0
+
+    def _grow(self):
+        cap = self.cap * 2
+        if np is not None:
+            f = np.zeros((len(_EFIELDS), cap)); f[:, :self.cap] = self.f; self.f = f
+            self.kind  = np.concatenate((self.kind,  np.zeros(self.cap, np.int8)))
+            self.state = np.concatenate((self.state, np.zeros(self.cap, np.int8)))
+        else:
+            for c in self.f: c.extend([0.0]*self.cap)
+            self.kind.extend([0]*self.cap); self.state.extend([0]*self.cap)
+        self.cap = cap
+
+    def spawn(self, etype, x, y, diff_mult=1.0):
+        if self.n >= self.cap: self._grow()
+        pr = EPROTO[etype]; d = ETYPE[etype]; i = self.n; self.n += 1
+        if self.pool: e = self.pool.pop(); self.stats["reused"] += 1
+        else:         e = Enemy()
+        self.stats["spawned"] += 1
+        e.m, e.i, e.proto = self, i, pr
+        row = pr.row[:]
+        row[_EX], row[_EY] = row[_EPTX], row[_EPTY] = row[_EOX], row[_EOY] = float(x), float(y)
+        row[_EHP] = row[_EMHP] = int(d["hp"]*diff_mult)
+        row[_EATK] = int(d["atk"]*diff_mult)
+        row[_ECELL] = self.grid.insert(e, x, y)
+        if np is not None: self.f[:, i] = row
+        else:
+            for c, v in zip(self.f, row): c[i] = v
+        self.kind[i] = pr.kind; self.state[i] = PATROL
+        self.handles.append(e); self.routes.append(None)
+        return e
+
+    def remove(self, e):
+        if e not in self: return
+        i, last = e.i, self.n - 1
+        if np is not None: e._snap[:] = self.f[:, i].tolist()
+        else:              e._snap[:] = [c[i] for c in self.f]
+        e._snap_state = int(self.state[i])
+        self.grid.remove(e, int(e._snap[_ECELL]))
+        if i != last:
+            if np is not None: self.f[:, i] = self.f[:, last]
+            else:
+                for c in self.f: c[i] = c[last]
+            self.kind[i] = self.kind[last]; self.state[i] = self.state[last]
+            h = self.handles[last]; h.i = i; self.handles[i] = h
+            self.routes[i] = self.routes[last]
+        self.handles.pop(); self.routes.pop(); self.n = last; e.i = -1
+        self._freed.append(e); self.stats["freed"] += 1
+
+    def clear(self):
+        for e in self.handles[::-1]: self.remove(e)
+
+    def _recycle(self):
+        """Handles removed before this update() can no longer be referenced — pool them"""
+        for e in self._freed: e.m = None
+        self.pool.extend(self._freed); self._freed.clear()
+
+    def pool_stats(self):
+        return dict(self.stats, live=self.n, pooled=len(self.pool) + len(self._freed))
+
+    def _rows(self, cand):
+        """Grid candidates → their rows, in row order"""
+        return sorted(e.i for e in cand)
+
+    def in_radius(self, x, y, r):
+        """Enemies strictly closer than r to (x,y), in row order"""
+        rows = self._rows(self.grid.query_radius(x, y, r))
+        X, Y = self.f[_EX], self.f[_EY]
+        if np is not None and len(rows) > 16:
+            rows = np.array(rows)
+            return [self.handles[i] for i in rows[np.hypot(X[rows]-x, Y[rows]-y) < r].tolist()]
+        return [self.handles[i] for i in rows if math.hypot(X[i]-x, Y[i]-y) < r]
+
+    def in_rect(self, x0, y0, x1, y1):
+        """Enemies with x0 <= x < x1 and y0 <= y < y1, in row order"""
+        rows = self._rows(self.grid.query_rect(x0, y0, x1, y1))
+        X, Y = self.f[_EX], self.f[_EY]
+        if np is not None and len(rows) > 16:
+            rows = np.array(rows); x, y = X[rows], Y[rows]
+            return [self.handles[i] for i in rows[(x0 <= x) & (x < x1) & (y0 <= y) & (y < y1)].tolist()]
+        return [self.handles[i] for i in rows if x0 <= X[i] < x1 and y0 <= Y[i] < y1]
+
+    def cull(self, x, y, r):
+        """Drop enemies r or further from (x,y) — only cells reaching past r are checked"""
+        X, Y = self.f[_EX], self.f[_EY]
+        far = [e for e in self.grid.outside(x, y, r) if math.hypot(X[e.i]-x, Y[e.i]-y) >= r]
+        for e in far: self.remove(e)
+
+    def draw(self, surf, cx, cy, alpha=1.0):
+        """Every on-screen enemy, in row order, as one blits call — drawn at
+        alpha of the way from its previous position to its current one"""
+        rows = [e.i for e in self.in_rect(cx-60, cy-60, cx+SW+60, cy+SH+60)]
+        if not rows: return
+        if np is not None: cols = self.f[:, rows].T.tolist()
+        else:              cols = [[c[i] for c in self.f] for i in rows]
+        out = []; h = self.handles
+        for i, r in zip(rows, cols):
+            x = r[_EOX] + (r[_EX]-r[_EOX])*alpha; y = r[_EOY] + (r[_EY]-r[_EOY])*alpha
+            _enemy_blits(out, h[i].proto, x-cx, y-cy, r[_EANG], r[_EANIM],
+                         r[_EFLASH], r[_EPOISON], r[_EHP], r[_EMHP])
+        surf.blits(out, False)
+
+    def _rehash(self):
+        """Re-file rows whose position moved them into another grid cell"""
+        g, h, n = self.grid, self.handles, self.n
+        if np is not None:
+            f = self.f[:, :n]; c = g.cell
+            k = (((f[_EX] // c).astype(np.int64) & 0xFFFF) << 16) | ((f[_EY] // c).astype(np.int64) & 0xFFFF)
+            for i in np.flatnonzero(k != f[_ECELL]).tolist():
+                f[_ECELL, i] = g.move(h[i], int(f[_ECELL, i]), f[_EX, i], f[_EY, i])
+        else:
+            X, Y, C = self.f[_EX], self.f[_EY], self.f[_ECELL]
+            for i in range(n): C[i] = g.move(h[i], int(C[i]), X[i], Y[i])
+
+    def dead(self):
+        """Enemies whose hp has run out"""
+        if np is not None: return [self.handles[i] for i in np.flatnonzero(self.f[_EHP, :self.n] <= 0).tolist()]
+        return [self.handles[i] for i in range(self.n) if self.f[_EHP][i] <= 0]
+
+    def update(self, px, py, world, dt, flow=None, nav=None):
+        """Advance every enemy one step → [(Enemy, "attack" | "dead")] in row order.
+        Chasers follow `flow` (nav.FlowField toward the player) and patrols walk
+        `nav` (nav.NavGraph) routes when given."""
+        if self._freed: self._recycle()
+        if not self.n: return []
+        # small groups: fixed numpy overhead costs more than the scalar loop
+        if np is None or self.n < 24: return self._update_py(px, py, world, dt, flow, nav)
+        f = self.f[:, :self.n]; st = self.state[:self.n]
+        f[_EOX] = f[_EX]; f[_EOY] = f[_EY]
+        X, Y = f[_EX], f[_EY]
+        np.maximum(f[_EACD]-dt, 0, out=f[_EACD]); np.maximum(f[_EFLASH]-dt, 0, out=f[_EFLASH])
+        # Poison ticks
+        pois = f[_EPOISON] > 0
+        f[_EPOISON, pois] -= dt; f[_EHP, pois] -= dt*6
+        dead = pois & (f[_EHP] <= 0)
         # Knockback — ลด exponential แบบ frame-rate independent ไม่กระตุก
-        if abs(self.kbx)>0.5 or abs(self.kby)>0.5:
-            nx = self.x + self.kbx*dt*60; ny = self.y + self.kby*dt*60
-            if world.walkable(int(nx//TILE), int(ny//TILE)):
-                self.x, self.y = nx, ny
-            damp = 0.75 ** (dt * 60)   # frame-rate independent damping
-            self.kbx *= damp; self.kby *= damp
-            return None
-
-        dx, dy = px-self.x, py-self.y
-        dist = math.hypot(dx,dy)
-        if dist < self.alert_r: self.state = "chase"
-        elif self.state=="chase" and dist > self.alert_r*1.6: self.state="patrol"
-
-        spd = self.spd*60*dt
-        if self.state == "chase":
-            if dist > 5:
-                self.ang = math.atan2(dy,dx)
-                nx = self.x + (dx/dist)*spd; ny = self.y + (dy/dist)*spd
-                if world.walkable(int(nx//TILE), int(ny//TILE)):
-                    self.x, self.y = nx, ny
-                    self.anim += dt*6
-            if dist < self.atk_r and self.acd <= 0:
-                self.acd = 1.6; return "attack"
+        kb = ~dead & ((np.abs(f[_EKBX]) > 0.5) | (np.abs(f[_EKBY]) > 0.5))
+        ki = np.flatnonzero(kb)
+        if len(ki):
+            self._move(world, ki, X[ki] + f[_EKBX, ki]*dt*60, Y[ki] + f[_EKBY, ki]*dt*60)
+            damp = 0.75 ** (dt * 60)
+            f[_EKBX, ki] *= damp; f[_EKBY, ki] *= damp
+        act = ~(dead | kb)
+        dx, dy = px-X, py-Y
+        dist = np.hypot(dx, dy)
+        st[act & (dist < f[_EALERT])] = CHASE
+        st[act & (st == CHASE) & (dist > f[_EALERT]*1.6)] = PATROL
+        spd = f[_ESPD]*60*dt
+        # Chase
+        chase = act & (st == CHASE)
+        mv = np.flatnonzero(chase & (dist > 5))
+        if len(mv):
+            sdx, sdy, sd = dx[mv], dy[mv], dist[mv]
+            if flow is not None:            # around obstacles: head for the next tile of the field
+                has, sx, sy = flow.step_np(X[mv], Y[mv])
+                sdx = np.where(has, sx - X[mv], sdx); sdy = np.where(has, sy - Y[mv], sdy)
+                sd = np.maximum(np.hypot(sdx, sdy), 1e-6)
+            f[_EANG, mv] = np.arctan2(sdy, sdx)
+            ok = self._move(world, mv, X[mv] + sdx/sd*spd[mv], Y[mv] + sdy/sd*spd[mv])
+            f[_EANIM, mv[ok]] += dt*6
+        atk = chase & (dist < f[_EATKR]) & (f[_EACD] <= 0)
+        f[_EACD, atk] = 1.6
+        # Patrol — wander to a random target nearby
+        pat = np.flatnonzero(act & (st == PATROL))
+        if len(pat):
+            pdx, pdy = f[_EPTX, pat]-X[pat], f[_EPTY, pat]-Y[pat]
+            pd = np.hypot(pdx, pdy)
+            rr = self.roll.random
+            roll = np.array([rr() for _ in range(len(pat))]) < 0.007
+            re = (pd < 8) | roll
+            r = pat[re]
+            if nav is not None:             # walk a real route to a reachable spot
+                for i, fresh in zip(r.tolist(), roll[re].tolist()): self._patrol_next(i, nav, fresh)
+            elif len(r):
+                u = self.pick.uniform
+                o = np.array([u(-140, 140) for _ in range(2*len(r))])
+                f[_EPTX, r] = X[r] + o[0::2]
+                f[_EPTY, r] = Y[r] + o[1::2]
+            sel = ~re & (pd > 0); mv = pat[sel]
+            if len(mv):
+                pdx, pdy, pd = pdx[sel], pdy[sel], pd[sel]
+                f[_EANG, mv] = np.arctan2(pdy, pdx)
+                ok = self._move(world, mv, X[mv] + pdx/pd*spd[mv]*0.5, Y[mv] + pdy/pd*spd[mv]*0.5)
+                f[_EANIM, mv[ok]] += dt*3
+        self._rehash()
+        h = self.handles
+        return [(h[i], "dead" if dead[i] else "attack") for i in np.flatnonzero(dead | atk).tolist()]
+
+    def _patrol_next(self, i, nav, fresh):
+        """Point row i's patrol target at the next waypoint of its route —
+        or plan a route to a new reachable spot nearby (fresh = drop the old one)"""
+        F = self.f
+        x, y = (float(F[_EX, i]), float(F[_EY, i])) if np is not None else (F[_EX][i], F[_EY][i])
+        r = self.routes[i]
+        t = None if fresh or not r else r.next()
+        if t is None:
+            u = self.pick.uniform
+            dest = (int((x + u(-140, 140)) // TILE), int((y + u(-140, 140)) // TILE))
+            r = self.routes[i] = nav.walk((int(x // TILE), int(y // TILE)), dest)
+            t = r.next() if r else None
+        if t is None:         # nowhere to go — wander like before
+            wx, wy = x + self.pick.uniform(-140, 140), y + self.pick.uniform(-140, 140)
         else:
-            pdx, pdy = self.ptarget[0]-self.x, self.ptarget[1]-self.y
-            pd = math.hypot(pdx,pdy)
-            if pd < 8 or random.random()<0.007:
-                self.ptarget = (self.x+random.uniform(-140,140), self.y+random.uniform(-140,140))
-            elif pd > 0:
-                self.ang = math.atan2(pdy,pdx)
-                nx = self.x+(pdx/pd)*spd*0.5; ny = self.y+(pdy/pd)*spd*0.5
-                if world.walkable(int(nx//TILE), int(ny//TILE)):
-                    self.x, self.y = nx, ny
-                    self.anim += dt*3
-        return None
+            wx, wy = t[0]*TILE + TILE/2, t[1]*TILE + TILE/2
+        if np is not None: F[_EPTX, i] = wx; F[_EPTY, i] = wy
+        else:              F[_EPTX][i] = wx; F[_EPTY][i] = wy
 
-    def draw(self, surf, cx, cy):
-        sx, sy = int(self.x-cx), int(self.y-cy)
-        if not (-60<sx<SW+60 and -60<sy<SH+60): return
+    def _move(self, world, rows, nx, ny):
+        """Move rows to (nx,ny) where that tile is walkable → mask of rows that moved"""
+        ok = world.walkable_np((nx // TILE).astype(np.int64), (ny // TILE).astype(np.int64))
+        self.f[_EX, rows[ok]] = nx[ok]; self.f[_EY, rows[ok]] = ny[ok]
+        return ok
 
-        # Shadow
-        pygame.draw.ellipse(surf, PAL["shadow"], (sx-self.sz, sy+self.sz-6, self.sz*2, self.sz//2+4))
-
-        # Body with walk bob
-        bob = int(math.sin(self.anim*math.pi)*2)
-        col = (255,90,90) if self.flash>0 else self.col
-        if self.poison > 0: col = tuple(max(0,min(255,c+v)) for c,v in zip(col,(0,50,-20)))
-
-        pygame.draw.circle(surf, col, (sx, sy-bob), self.sz)
-        # Outline
-        pygame.draw.circle(surf, tuple(max(0,c-40) for c in col), (sx, sy-bob), self.sz, 2)
-
-        # Eyes follow direction
-        ex = int(sx + self.sz*0.55*math.cos(self.ang))
-        ey = int(sy - bob + self.sz*0.55*math.sin(self.ang))
-        pygame.draw.circle(surf, (255,235,180), (ex,ey), 5)
-        pygame.draw.circle(surf, (200,0,0),     (ex,ey), 3)
-
-        # HP bar (only when damaged)
-        if self.hp < self.mhp:
-            bw = self.sz*2+4; bx = sx-self.sz-2; by = sy-self.sz-bob-14
-            pygame.draw.rect(surf, (40,15,15), (bx,by,bw,6), border_radius=3)
-            ratio = max(0, self.hp/self.mhp)
-            bar_col = PAL["hp"] if ratio>0.4 else PAL["hp_low"]
-            pygame.draw.rect(surf, bar_col, (bx,by,int(bw*ratio),6), border_radius=3)
-
-        # Name label
-        if not Enemy._font:
-            Enemy._font = pygame.font.SysFont(None, 15)
-        t = Enemy._font.render(self.name, True, (220,210,195))
-        surf.blit(t, (sx-t.get_width()//2, sy-self.sz-bob-28))
+    def _update_py(self, px, py, world, dt, flow=None, nav=None):
+        F = self.f; out = []
+        F[_EOX][:self.n] = F[_EX][:self.n]; F[_EOY][:self.n] = F[_EY][:self.n]
+        for i in range(self.n):
+            F[_EACD][i] = max(0, F[_EACD][i]-dt); F[_EFLASH][i] = max(0, F[_EFLASH][i]-dt)
+            if F[_EPOISON][i] > 0:
+                F[_EPOISON][i] -= dt; F[_EHP][i] -= dt*6
+                if F[_EHP][i] <= 0: out.append((self.handles[i], "dead")); continue
+            x, y = F[_EX][i], F[_EY][i]
+            kbx, kby = F[_EKBX][i], F[_EKBY][i]
+            if abs(kbx)>0.5 or abs(kby)>0.5:
+                nx = x + kbx*dt*60; ny = y + kby*dt*60
+                if world.walkable(int(nx//TILE), int(ny//TILE)):
+                    F[_EX][i], F[_EY][i] = nx, ny
+                damp = 0.75 ** (dt * 60)
+                F[_EKBX][i] = kbx*damp; F[_EKBY][i] = kby*damp
+                continue
+            dx, dy = px-x, py-y
+            dist = math.hypot(dx,dy)
+            alert = F[_EALERT][i]
+            if dist < alert: self.state[i] = CHASE
+            elif self.state[i] == CHASE and dist > alert*1.6: self.state[i] = PATROL
+            spd = F[_ESPD][i]*60*dt
+            if self.state[i] == CHASE:
+                if dist > 5:
+                    sdx, sdy, sd = dx, dy, dist
+                    st = flow.step(x, y) if flow is not None else None
+                    if st is not None:
+                        sdx, sdy = st[0]-x, st[1]-y; sd = max(math.hypot(sdx, sdy), 1e-6)
+                    F[_EANG][i] = math.atan2(sdy,sdx)
+                    nx = x + (sdx/sd)*spd; ny = y + (sdy/sd)*spd
+                    if world.walkable(int(nx//TILE), int(ny//TILE)):
+                        F[_EX][i], F[_EY][i] = nx, ny
+                        F[_EANIM][i] += dt*6
+                if dist < F[_EATKR][i] and F[_EACD][i] <= 0:
+                    F[_EACD][i] = 1.6; out.append((self.handles[i], "attack"))
+            else:
+                pdx, pdy = F[_EPTX][i]-x, F[_EPTY][i]-y
+                pd = math.hypot(pdx,pdy)
+                roll = self.roll.random() < 0.007
+                if pd < 8 or roll:
+                    if nav is not None: self._patrol_next(i, nav, roll)
+                    else: F[_EPTX][i] = x+self.pick.uniform(-140,140); F[_EPTY][i] = y+self.pick.uniform(-140,140)
+                elif pd > 0:
+                    F[_EANG][i] = math.atan2(pdy,pdx)
+                    nx = x+(pdx/pd)*spd*0.5; ny = y+(pdy/pd)*spd*0.5
+                    if world.walkable(int(nx//TILE), int(ny//TILE)):
+                        F[_EX][i], F[_EY][i] = nx, ny
+                        F[_EANIM][i] += dt*3
+        self._rehash()
+        return out
 
 
 # ─ Player cosmetic options ─
@@ -176,9 +709,24 @@ SHIRT_COLS = [(35,100,35),(48,48,178),(175,48,48),(178,118,28),(98,28,118),(48,1
 PANTS_COLS = [(38,33,8),(18,18,78),(78,28,28),(98,68,18),(58,18,78),(28,98,98),(28,28,28)]
 HATS = ["none","cap","helmet","crown","hood"]
 START_WEPS = ["fists","stone_knife","wooden_spear","iron_sword"]
+TRAP_RATE = 0.048   # catches per second per trap (the old 0.0008 per frame at 60 FPS)
+
+
+def _countdown(name):
+    """Seconds left on a cooldown — stored as a deadline on the player's timer wheel"""
+    attr = "_" + name + "_end"
+    def get(self): return max(0.0, getattr(self, attr) - self.timers.now)
+    def set(self, v): setattr(self, attr, self.timers.now + v)
+    return property(get, set)
+
 
 class Player:
-    def __init__(self, name, x, y, skin, hair, shirt, pants, hat, weapon, diff):
+    flash  = _countdown("flash")
+    hit_cd = _countdown("hit_cd")
+    atk_cd = _countdown("atk_cd")
+
+    def __init__(self, name, x, y, skin, hair, shirt, pants, hat, weapon, diff, timers=None):
+        self.timers = timers or TimerWheel()   # Game passes its own; advanced by Game._update
         self.name = name
         self.x = float(x); self.y = float(y)
         self.skin = skin; self.hair = hair
@@ -195,7 +743,8 @@ class Player:
         self.inv = {}      # id → qty
         self.campfires = []; self.shelters = []; self.traps = []; self.torches = []
         self.houses = []      # [(x,y)]
-        self.farm_plots = {}  # (x,y) -> {"crop":None,"stage":0,"water":0,"fertilized":False}
+        self.structures = Structures(self)   # spatial index over the lists above
+        self.farm = Farm()    # farm plots on the tile grid
 
         self.day = 1; self.gtime = 0.0
         self.survived = 0; self.kills = 0; self.crafted = 0
@@ -206,12 +755,14 @@ class Player:
         self.flash = 0.0
         self.hit_cd = 0.0   # invincibility frames หลังโดนตี
         self.dead = False
+        self._combo_tm = None
         self.combo = 0; self.combo_t = 0.0
         self.poison_stacks = 0
         self.speed = 3.0
         self.step_cd = 0.0
 
         self.arrows = 5   # starting arrows
+        self.timers.after(1.0, self._trap_roll)
 
     # ── Inventory ──
     def give(self, iid, qty=1):
@@ -258,9 +809,8 @@ class Player:
 
         # Decay
         nm = self.diff["nm"] * dt
-        near_fire     = any(math.hypot(self.x-fx, self.y-fy)<TILE*4.5 for fx,fy in self.campfires)
-        near_shelter  = any(math.hypot(self.x-sx, self.y-sy)<TILE*3   for sx,sy in self.shelters)
-        near_house    = any(math.hypot(self.x-hx, self.y-hy)<TILE*4   for hx,hy in self.houses)
+        env = self.structures.env(self.x, self.y)
+        near_fire, near_shelter, near_house = env.near_fire, env.near_shelter, env.near_house
         self.hunger = max(0, self.hunger - nm*0.35)
         self.thirst = max(0, self.thirst - nm*0.55)
         if near_fire or near_shelter or near_house: self.stamina = min(100, self.stamina + dt*2.2)
@@ -272,12 +822,7 @@ class Player:
         if self.thirst <= 0: self.hp = max(0, self.hp - dt*1.0)
         if self.hp <= 0: self.dead = True; return
 
-        # Timers
-        self.flash   = max(0, self.flash-dt)
-        self.hit_cd  = max(0, self.hit_cd-dt)
-        self.atk_cd  = max(0, self.atk_cd-dt)
-        self.combo_t = max(0, self.combo_t-dt)
-        if self.combo_t <= 0: self.combo = 0
+        # Swing animation (cooldowns are deadlines on self.timers)
         if self.is_swinging:
             self.atk_anim = min(1, self.atk_anim+dt*9)
             if self.atk_anim >= 1: self.is_swinging=False; self.atk_anim=0
@@ -302,7 +847,7 @@ class Player:
             self.step_cd -= dt
             if self.step_cd <= 0:
                 self.step_cd = 0.28
-                ps.emit(self.x, self.y+16, PAL["mud"], 3, 25, 0.2, 3)
+                ps.emit(self.x, self.y+16, PAL["mud"], 3, 25, 0.2, 3, emitter="ambient")
 
         # Auto-pickup
         tx, ty = int(self.x//TILE), int(self.y//TILE)
@@ -310,68 +855,66 @@ class Player:
             for it in world.pop_drops(*c):
                 self.give(it["id"], it["qty"])
 
-        # Trap check
-        for trap in self.traps[:]:
-            if random.random() < 0.0008:
-                if math.hypot(self.x-trap[0], self.y-trap[1]) < 6:
-                    self.give("meat",1); self.traps.remove(trap)
-
-    def update_farm_plots(self, dt):
-        """Grow crops over time. Call every frame."""
-        CROPS = {"carrot":{"time":40.0,"food":(35,5)},
-                 "potato":{"time":55.0,"food":(50,8)},
-                 "cabbage":{"time":35.0,"food":(28,6)}}
-        for pos, plot in self.farm_plots.items():
-            if plot["crop"] and plot["water"] > 0:
-                speed = 2.0 if plot["fertilized"] else 1.0
-                plot["stage"] = min(1.0, plot["stage"] + dt/CROPS[plot["crop"]]["time"] * speed)
-                plot["water"] = max(0, plot["water"] - dt*0.008)
+    @property
+    def clock(self):
+        """Game seconds since the run began (gtime*15) — the farm's time base"""
+        return self.gtime*15
+
+    @property
+    def combo_t(self):
+        return max(0.0, self._combo_end - self.timers.now)
+
+    @combo_t.setter
+    def combo_t(self, v):
+        """Combo window — the combo drops to 0 when it runs out"""
+        self._combo_end = self.timers.now + v
+        if self._combo_tm: self._combo_tm.cancel()
+        self._combo_tm = self.timers.after(v, self._combo_over) if v > 0 else None
+
+    def _combo_over(self):
+        self.combo = 0; self._combo_tm = None
+
+    def _trap_roll(self):
+        """Some trap's roll came up (all traps together at len*TRAP_RATE per second):
+        it catches if the player stands on it"""
+        if self.traps and not self.dead:
+            trap = random.choice(self.traps)
+            if math.hypot(self.x-trap[0], self.y-trap[1]) < 6:
+                self.give("meat",1); self.structures.remove("trap", trap)
+        rate = len(self.traps) * TRAP_RATE
+        self.timers.after(random.expovariate(rate) if rate else 1.0, self._trap_roll)
 
     def harvest_plot(self, px, py):
         """Harvest ready crop at nearby farm plot."""
-        CROPS = {"carrot":{"time":40.0,"food":(35,5)},
-                 "potato":{"time":55.0,"food":(50,8)},
-                 "cabbage":{"time":35.0,"food":(28,6)}}
-        for pos, plot in list(self.farm_plots.items()):
-            fx, fy = pos
-            if math.hypot(px-fx, py-fy) < TILE*1.5 and plot["crop"] and plot["stage"] >= 1.0:
-                crop = plot["crop"]
-                qty  = 2 if plot["fertilized"] else 1
-                self.give(crop, qty)
-                # Also add seed back sometimes
-                if random.random() < 0.4: self.give("veggie_seed", 1)
-                # Reset plot
-                plot["crop"] = None; plot["stage"] = 0; plot["water"] = 0; plot["fertilized"] = False
-                return crop, qty
-        return None, 0
+        crop, qty = self.farm.harvest(px, py, self.clock)
+        if crop:
+            self.give(crop, qty)
+            # Also add seed back sometimes
+            if random.random() < 0.4: self.give("veggie_seed", 1)
+        return crop, qty
 
     def plant_seed(self, px, py, crop="carrot"):
         """Plant veggie seed in nearest empty farm plot."""
-        for pos, plot in self.farm_plots.items():
-            fx, fy = pos
-            if math.hypot(px-fx, py-fy) < TILE*1.5 and plot["crop"] is None:
-                if self.take("veggie_seed"):
-                    plot["crop"]  = crop
-                    plot["stage"] = 0
-                    plot["water"] = 50
-                    return crop
+        plot = self.farm.empty_plot(px, py)
+        if plot is not None and self.take("veggie_seed"):
+            self.farm.plant(plot, crop, self.clock)
+            return crop
         return None
 
     def water_plot(self, px, py, world):
         """Water farm plots nearby using watering_can."""
         if not self.inv.get("watering_can", 0): return False
-        watered = False
-        for pos, plot in self.farm_plots.items():
-            fx, fy = pos
-            if math.hypot(px-fx, py-fy) < TILE*2:
-                plot["water"] = min(100, plot["water"] + 60)
-                watered = True
-        return watered
+        return self.farm.water(px, py, self.clock)
+
+    def fertilize_plot(self, px, py):
+        """Fertilize the nearest growing plot that has none yet."""
+        if not self.inv.get("fertilizer", 0): return False
+        return self.farm.fertilize(px, py, self.clock) and self.take("fertilizer")
 
     def drink(self, world):
         tx,ty = int(self.x//TILE), int(self.y//TILE)
         for cx,cy in [(tx,ty),(tx-1,ty),(tx+1,ty),(tx,ty-1),(tx,ty+1)]:
-            if 0<=cy<world.H and 0<=cx<world.W and world.tiles[cy][cx] in (TWATER,TDEEP):
+            if world.tile(cx,cy) in (TWATER,TDEEP):
                 self.thirst = min(100, self.thirst+50); return True
         return False
 
@@ -504,5 +1047,5 @@ class Player:
             "traps":self.traps,"torches":self.torches,
             "arrows":self.arrows,
             "houses":self.houses,
-            "farm_plots":{str(k):v for k,v in self.farm_plots.items()},
+            "farm_plots":self.farm.to_save(self.clock),
         }
@@ -0,0 +1,136 @@
+"""
+farm.py — แปลงผัก: การเติบโตคำนวณจากเวลา ไม่ต้องอัปเดตทุกเฟรม
+
+Each plot stores its state at the last time something touched it (plant,
+water, fertilize, harvest) plus that timestamp; stage and water at any later
+time follow in closed form, so idle farms cost nothing per frame. Plots sit
+on a tile grid: one plot per tile, drawn at the tile centre.
+"""
+import ast
+import math
+from config import TILE
+
+CROPS = {"carrot": {"time":40.0, "food":(35,5)},
+         "potato": {"time":55.0, "food":(50,8)},
+         "cabbage":{"time":35.0, "food":(28,6)}}
+WATER_DECAY = 0.008   # water lost per second while a crop is planted
+
+
+class Plot:
+    __slots__ = ("crop", "stage", "water", "fertilized", "t")
+
+    def __init__(self, crop=None, stage=0.0, water=50, fertilized=False, t=0.0):
+        self.crop, self.stage, self.water, self.fertilized, self.t = crop, stage, water, fertilized, t
+
+    def at(self, now):
+        """(stage, water) at time now — the crop grows only while water lasts"""
+        if not self.crop: return self.stage, self.water
+        el = max(0.0, now - self.t)
+        grow = min(el, self.water / WATER_DECAY)
+        speed = 2.0 if self.fertilized else 1.0
+        return (min(1.0, self.stage + grow*speed/CROPS[self.crop]["time"]),
+                max(0, self.water - el*WATER_DECAY))
+
+    def settle(self, now):
+        """Fold the time since the last change into the stored state"""
+        self.stage, self.water = self.at(now); self.t = now
+
+    def state(self, now):
+        stage, water = self.at(now)
+        return {"crop":self.crop, "stage":stage, "water":water, "fertilized":self.fertilized}
+
+
+class Farm:
+    """(tx, ty) → Plot; queries look only at the tiles around a point"""
+
+    def __init__(self):
+        self.plots = {}
+
+    def __len__(self): return len(self.plots)
+
+    def place(self, x, y, now=0.0):
+        """New empty plot on the tile under (x,y) → False if that tile has one"""
+        key = (int(x // TILE), int(y // TILE))
+        if key in self.plots: return False
+        self.plots[key] = Plot(t=now)
+        return True
+
+    def near(self, x, y, r):
+        """Plots with their tile centre strictly closer than r to (x,y), nearest first"""
+        tx, ty, n = int(x // TILE), int(y // TILE), int(r // TILE) + 1
+        out = []
+        for py in range(ty-n, ty+n+1):
+            for px in range(tx-n, tx+n+1):
+                p = self.plots.get((px, py))
+                if p is None: continue
+                d = math.hypot(x - (px*TILE + TILE/2), y - (py*TILE + TILE/2))
+                if d < r: out.append((d, px, py, p))
+        out.sort(key=lambda e: e[0])
+        return [p for _, _, _, p in out]
+
+    def harvest(self, x, y, now):
+        """Harvest the nearest ripe plot → (crop, qty) or (None, 0)"""
+        for p in self.near(x, y, TILE*1.5):
+            if p.crop and p.at(now)[0] >= 1.0:
+                crop, qty = p.crop, 2 if p.fertilized else 1
+                p.crop, p.stage, p.water, p.fertilized, p.t = None, 0.0, 0, False, now
+                return crop, qty
+        return None, 0
+
+    def empty_plot(self, x, y):
+        """Nearest plot with nothing planted, or None"""
+        for p in self.near(x, y, TILE*1.5):
+            if p.crop is None: return p
+        return None
+
+    def plant(self, p, crop, now):
+        p.crop, p.stage, p.water, p.t = crop, 0.0, 50, now
+
+    def water(self, x, y, now):
+        """Water every plot in reach → True if any"""
+        ps = self.near(x, y, TILE*2)
+        for p in ps:
+            p.settle(now); p.water = min(100, p.water + 60)
+        return bool(ps)
+
+    def fertilize(self, x, y, now):
+        """Fertilize the nearest planted, unfertilized plot → True if one was"""
+        for p in self.near(x, y, TILE*1.5):
+            if p.crop and not p.fertilized:
+                p.settle(now); p.fertilized = True
+                return True
+        return False
+
+    def visible(self, x0, y0, x1, y1, now):
+        """[(cx, cy, state dict)] for plots whose tile centre lies in the rect"""
+        tx0, ty0, tx1, ty1 = int(x0 // TILE), int(y0 // TILE), int(x1 // TILE), int(y1 // TILE)
+        if len(self.plots) < (tx1-tx0+1)*(ty1-ty0+1):
+            keys = [k for k in self.plots if tx0 <= k[0] <= tx1 and ty0 <= k[1] <= ty1]
+        else:
+            keys = [(tx, ty) for ty in range(ty0, ty1+1) for tx in range(tx0, tx1+1) if (tx, ty) in self.plots]
+        return [(tx*TILE + TILE//2, ty*TILE + TILE//2, self.plots[tx, ty].state(now)) for tx, ty in keys]
+
+    # ── Save ──
+    def to_save(self, now):
+        out = []
+        for (tx, ty), p in self.plots.items():
+            stage, water = p.at(now)
+            out.append([tx, ty, p.crop, stage, water, p.fertilized])
+        return out
+
+    @classmethod
+    def from_save(cls, data, now):
+        """Rows from to_save — or an older save's {"(x, y)": plot dict} keyed by position"""
+        f = cls()
+        if isinstance(data, dict):
+            rows = []
+            for k, v in data.items():
+                try: x, y = ast.literal_eval(k)
+                except (ValueError, SyntaxError) as e: print(f"[farm] {e}"); continue
+                rows.append([int(x // TILE), int(y // TILE), v.get("crop"), v.get("stage", 0),
+                             v.get("water", 0), v.get("fertilized", False)])
+            data = rows
+        for tx, ty, crop, stage, water, fert in data:
+            if (tx, ty) not in f.plots:
+                f.plots[tx, ty] = Plot(crop, float(stage), water, bool(fert), now)
+        return f
@@ -6,36 +6,50 @@ import random
 import os
 import sys
 import json
-import copy
 import time
 import pygame
 
 from config import (
-    SW, SH, TILE, FPS, SAVE, PROGRESS,
-    PAL, WEAPON_DATA, ITEM_COLS, ITEM_NAMES, RECIPES, DIFFS, STAGES,
+    SW, SH, TILE, FPS, FIXED_DT, MAX_STEPS, SAVE, PROGRESS, CHUNK, PREFETCH_AT, NAV_PUMP,
+    PAL, ITEM_COLS, ITEM_NAMES, RECIPES, DIFFS, STAGES,
     SKIN_COLS, HAIR_COLS, SHIRT_COLS, PANTS_COLS,
-    TGRASS, TWATER, TDEEP, TMUD, TROCK, TSAND,
+    TMUD, TROCK, TSAND,
 )
 from audio import Audio
-from world import World, _precompute_tiles, get_tile_surf
-from entities import PS, Enemy, Player
+from world import World, TerrainLayer, _precompute_tiles
+from nav import FlowField, NavGraph
+from loader import StageLoader
+from entities import PS, EnemyManager, Player
+from farm import Farm
+from timers import TimerWheel
 from renderer import (
-    draw_tree, draw_bush, draw_ore, draw_mushroom, draw_reed,
-    draw_flower, draw_campfire, draw_shelter, draw_torch,
+    obj_sprite, draw_campfire, draw_shelter, draw_torch,
     draw_house, draw_farm_plot
 )
 from ui import (
     draw_title, draw_customize, draw_stage_select,
     draw_stage_clear, draw_game_clear, draw_pause,
     draw_settings, draw_gameover, draw_hud,
-    draw_inventory, draw_craft, draw_mission_panel, day_night
+    draw_inventory, draw_craft, draw_mission_panel, draw_loading, day_night
 )
 
 class Game:
-    def __init__(self):
+    def __init__(self, headless=False, keys=None):
+        """headless — no window, fonts, audio or progress file; stages build inline.
+        Drive it with _update(FIXED_DT) (see sim.py).
+        keys — callable returning the held-key state for the player
+        (default pygame.key.get_pressed)."""
+        self.headless = headless
+        self.keys = keys or pygame.key.get_pressed
+        if headless:
+            os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+            os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
         pygame.init()
-        self.screen = pygame.display.set_mode((SW,SH))
-        pygame.display.set_caption("🌲 Forest Survival v3")
+        if headless:
+            self.screen = None
+        else:
+            self.screen = pygame.display.set_mode((SW,SH))
+            pygame.display.set_caption("🌲 Forest Survival v3")
         self.clock = pygame.time.Clock()
 
         # Fonts — try system fonts that render Thai
@@ -45,10 +59,11 @@ class Game:
                 except: pass
             return pygame.font.Font(None, size)
 
-        self.fonts = (make_font(22), make_font(44,True), make_font(16))
+        self.fonts = None if headless else (make_font(22), make_font(44,True), make_font(16))
 
-        _precompute_tiles()    # fill tile cache once — eliminates per-frame random
-        self.audio = Audio()
+        if not headless:
+            _precompute_tiles()    # fill tile cache once — eliminates per-frame random
+        self.audio = Audio(enabled=not headless)
         self.ps    = PS()
 
         # Pre-allocate reusable surfaces (ไม่ต้องสร้างใหม่ทุกเฟรม)
@@ -60,7 +75,12 @@ class Game:
         self.state = "title"
         self.player  = None
         self.world   = None
-        self.enemies = []
+        self.terrain = None   # TerrainLayer for self.world
+        self.flow    = None   # FlowField toward the player, for self.world
+        self.nav     = None   # NavGraph for patrol routes, for self.world
+        self.loader  = StageLoader(sync=headless)
+        self._pending = None  # (Future, name, carry) while a stage world is being built
+        self.enemies = EnemyManager()
         self.cam_x = 0.0; self.cam_y = 0.0
 
         # Title inputs
@@ -80,9 +100,14 @@ class Game:
         self.inv_scroll  = 0
         self.craft_scroll= 0
 
-        self.notifs      = []   # [msg, remaining, total]
-        self.frame       = 0
-        self.spawn_cd    = 5.0
+        self.timers      = TimerWheel()   # game time — runs only while playing
+        self.notifs      = []   # [msg, ends_at, total, Timer]
+        self.frame       = 0      # rendered frames (animation)
+        self.tick        = 0      # simulation steps (gameplay periodic checks)
+        self.alpha       = 1.0    # how far into the next step the frame is drawn
+        self._prev       = None   # (player, px, py, cam_x, cam_y) before the last step
+        self._stepped    = False  # did the last _update actually simulate
+        self._spawn_tm   = None
 
         # ── Stage / Mission system ──
         self.cur_stage_id    = 1          # stage player is on
@@ -95,7 +120,7 @@ class Game:
         self.game_clear_on   = False
 
         # โหลด progress (done_stages) จากไฟล์ถ้ามี
-        self._load_progress()
+        if not headless: self._load_progress()
         self._gc_btn         = pygame.Rect(0,0,1,1)
         self.stage_intro_t   = 0.0       # seconds left for intro banner
 
@@ -110,15 +135,34 @@ class Game:
         self._cu = ({}, [], R, R)          # customize
         self.running = True
 
+    @property
+    def stage_intro_t(self):
+        """Seconds left for the intro banner"""
+        return max(0.0, self._intro_end - self.timers.now)
+
+    @stage_intro_t.setter
+    def stage_intro_t(self, v): self._intro_end = self.timers.now + v
+
     # ── Notify ──
     def note(self, msg, dur=2.5):
         # ป้องกัน spam notification เดิมซ้ำๆ
         if self.notifs and self.notifs[-1][0] == msg:
-            self.notifs[-1][1] = dur; return
-        self.notifs.append([msg, dur, dur])
+            n = self.notifs[-1]; n[3].cancel()
+        else:
+            n = [msg, 0, dur, None]; self.notifs.append(n)
+        n[1] = self.timers.now + dur; n[3] = self.timers.after(dur, self._unnote, n)
         if len(self.notifs) > 5:
+            for old in self.notifs[:-5]: old[3].cancel()
             self.notifs = self.notifs[-5:]
 
+    def _unnote(self, n):
+        self.notifs = [x for x in self.notifs if x is not n]
+
+    def _reset_timers(self):
+        """Fresh game time for a new/loaded run: drop every pending timer"""
+        self.timers.clear(); self.notifs = []
+        self._spawn_tm = self.timers.every(10.0, self._spawn_enemies, first=5.0)
+
     def diff(self):
         return DIFFS[self.diff_idx]
 
@@ -129,56 +173,72 @@ class Game:
             if s["id"] == sid: return s
         return STAGES[0]
 
-    def new_game(self, name, seed=None):
+    def new_game(self, name, seed=None, carry=None):
+        """Start building the stage world in the background and show the loading
+        screen; _finish_new_game runs once it is ready. carry = player whose
+        progress moves to the new stage."""
+        stage = self._get_stage()
+        job = self.loader.take(stage["id"]) if seed is None else None
+        if job is None:
+            job = self.loader.request((seed or random.randint(1, 99999)) + stage["seed_off"])
+        self._pending = (job, name, carry)
+        self.state = "loading"
+
+    def _poll_loading(self):
+        job, name, carry = self._pending
+        if not job.done(): return
+        self._pending = None
         try:
-            stage = self._get_stage()
-            world_seed = (seed or random.randint(1, 99999)) + stage["seed_off"]
-            self.world = World(world_seed)
-            # หาจุด spawn ที่เดินได้ใกล้กลางแผนที่
-            _cx, _cy = self.world.W//2, self.world.H//2
-            cx, cy = _cx*TILE, _cy*TILE
-            found = False
-            for r in range(0, max(self.world.W, self.world.H)):
-                for dx in range(-r, r+1):
-                    for dy in range(-r, r+1):
-                        if r == 0 or abs(dx) == r or abs(dy) == r:
-                            tx, ty = _cx+dx, _cy+dy
-                            if self.world.walkable(tx, ty):
-                                cx, cy = tx*TILE, ty*TILE
-                                found = True
-                                break
-                    if found: break
-                if found: break
-            d = self.diff()
-            # Apply stage difficulty multipliers on top of player diff
-            import copy; ds = copy.copy(d)
-            ds = dict(d); ds["nm"] = d["nm"] * stage["nm_mult"]; ds["em"] = d["em"] * stage["em_mult"]
-            ds["ec"] = stage["ec"]
-            self.player = Player(
-                name or "นักผจญภัย", cx, cy,
-                tuple(self.cos["skin"]), tuple(self.cos["hair"]),
-                tuple(self.cos["shirt"]), tuple(self.cos["pants"]),
-                self.cos["hat"], self.cos["weapon"], ds
-            )
-            self.enemies = []; self.ps = PS()
-            self.show_inv=False; self.show_craft=False
-            self.show_set=False; self.paused=False
-            self.notifs=[]; self.spawn_cd=5.0
-            self.cam_x=cx-SW//2; self.cam_y=cy-SH//2
-            # Init mission stats
-            self.mstats = {m["key"]: 0 for m in stage["missions"]}
-            self.stage_clear_on = False
-            self.game_clear_on  = False
-            self.stage_intro_t  = 5.0
-            self._spawn_enemies()
-            self.state = "game"
-            for msg in stage["intro"]:
-                self.note(msg, 4.0)
+            self.world, (cx, cy), self.nav = job.result()
+            random.seed(self.world.seed)   # same run for the same seed
+            self._finish_new_game(name, cx, cy, carry)
         except Exception as e:
             print(f"[new_game error] {e}")
             import traceback; traceback.print_exc()
             self.state = "title"
 
+    def _finish_new_game(self, name, cx, cy, carry=None):
+        stage = self._get_stage()
+        d = self.diff()
+        # Apply stage difficulty multipliers on top of player diff
+        ds = dict(d); ds["nm"] = d["nm"] * stage["nm_mult"]; ds["em"] = d["em"] * stage["em_mult"]
+        ds["ec"] = stage["ec"]
+        self._reset_timers()
+        self.player = Player(
+            name or "นักผจญภัย", cx, cy,
+            tuple(self.cos["skin"]), tuple(self.cos["hair"]),
+            tuple(self.cos["shirt"]), tuple(self.cos["pants"]),
+            self.cos["hat"], self.cos["weapon"], ds, timers=self.timers
+        )
+        if carry:
+            self.player.level   = carry.level
+            self.player.xp      = carry.xp
+            self.player.xp_next = carry.xp_next
+            self.player.mhp     = carry.mhp
+            self.player.hp      = carry.mhp   # full heal on new stage
+            self.player.kills   = carry.kills
+            self.player.crafted = carry.crafted
+            self.player.survived= carry.survived
+            # Keep inventory
+            self.player.inv     = dict(carry.inv)
+            self.player.weapon  = carry.weapon
+            self.player.armor   = carry.armor
+            self.player.poison_stacks = carry.poison_stacks
+            self.player.arrows  = carry.arrows
+        self.enemies = EnemyManager(); self.ps = PS()
+        self.show_inv=False; self.show_craft=False
+        self.show_set=False; self.paused=False
+        self.cam_x=cx-SW//2; self.cam_y=cy-SH//2
+        # Init mission stats
+        self.mstats = {m["key"]: 0 for m in stage["missions"]}
+        self.stage_clear_on = False
+        self.game_clear_on  = False
+        self.stage_intro_t  = 5.0
+        self._spawn_enemies()
+        self.state = "game"
+        for msg in stage["intro"]:
+            self.note(msg, 4.0)
+
     def _start_stage(self, sid, keep_player=True):
         """Transition to a new stage, optionally keeping player stats."""
         self.cur_stage_id = sid
@@ -188,23 +248,7 @@ class Game:
         else:
             name = self.inp.strip() or "นักผจญภัย"
         # Keep player alive but teleport to new world
-        old_p = self.player
-        self.new_game(name)
-        if keep_player and old_p:
-            self.player.level   = old_p.level
-            self.player.xp      = old_p.xp
-            self.player.xp_next = old_p.xp_next
-            self.player.mhp     = old_p.mhp
-            self.player.hp      = old_p.mhp   # full heal on new stage
-            self.player.kills   = old_p.kills
-            self.player.crafted = old_p.crafted
-            self.player.survived= old_p.survived
-            # Keep inventory
-            self.player.inv     = dict(old_p.inv)
-            self.player.weapon  = old_p.weapon
-            self.player.armor   = old_p.armor
-            self.player.poison_stacks = old_p.poison_stacks
-            self.player.arrows  = old_p.arrows
+        self.new_game(name, carry=self.player if keep_player else None)
 
     def _load_progress(self):
         """โหลด done_stages และ cur_stage_id จากไฟล์ progress"""
@@ -219,6 +263,7 @@ class Game:
 
     def _save_progress(self):
         """บันทึก done_stages และ cur_stage_id ลงไฟล์ progress"""
+        if self.headless: return
         try:
             with open(PROGRESS,"w",encoding="utf-8") as f:
                 json.dump({
@@ -237,14 +282,18 @@ class Game:
             pd = data["player"]
             did = pd.get("diff_id","normal")
             d = next((x for x in DIFFS if x["id"]==did), DIFFS[1])
-            self.world = World(data["world_seed"])
+            # New saves carry a world delta; old ones only the seed
+            if "world" in data: self.world = World.from_save(data["world"])
+            else:               self.world = World(data["world_seed"])
+            random.seed(self.world.seed)
+            self._reset_timers()
             p = Player(
                 pd["name"], pd.get("x",0), pd.get("y",0),
                 tuple(pd.get("skin",list(SKIN_COLS[0]))),
                 tuple(pd.get("hair",list(HAIR_COLS[0]))),
                 tuple(pd.get("shirt",list(SHIRT_COLS[0]))),
                 tuple(pd.get("pants",list(PANTS_COLS[0]))),
-                pd.get("hat","none"), pd.get("weapon","fists"), d
+                pd.get("hat","none"), pd.get("weapon","fists"), d, timers=self.timers
             )
             # Restore all saved fields safely
             for k,v in pd.items():
@@ -257,14 +306,12 @@ class Game:
             p.traps    =[tuple(x) for x in pd.get("traps",[])]
             p.torches  =[tuple(x) for x in pd.get("torches",[])]
             p.houses   =[tuple(x) for x in pd.get("houses",[])]
-            raw_fp = pd.get("farm_plots",{})
-            p.farm_plots = {eval(k):v for k,v in raw_fp.items()}
+            p.farm = Farm.from_save(pd.get("farm_plots",[]), p.clock)
             p.diff = d
             self.player = p
-            self.enemies=[]; self.ps=PS()
+            self.enemies=EnemyManager(); self.ps=PS()
             self.show_inv=False; self.show_craft=False
             self.show_set=False; self.paused=False
-            self.notifs=[]; self.spawn_cd=5.0
             self._spawn_enemies()
             self.state="game"
             self.note(f"โหลดสำเร็จ! ยินดีต้อนรับกลับ {p.name}!")
@@ -278,7 +325,7 @@ class Game:
             with open(SAVE,"w",encoding="utf-8") as f:
                 json.dump({
                     "player": self.player.save(),
-                    "world_seed": self.world.seed,
+                    "world": self.world.save(),
                     "done_stages": self.done_stages,
                     "cur_stage_id": self.cur_stage_id,
                 }, f, ensure_ascii=False)
@@ -298,17 +345,16 @@ class Game:
         # Night adds demons to any stage
         if night and "demon" not in pool:
             pool = pool + ["demon"]; weights = weights + [2]
+        ptx, pty = int(self.player.x//TILE), int(self.player.y//TILE)
         attempts = 0
-        while len(self.enemies) < target and attempts < target*8:
+        while len(self.enemies) < target and attempts < target*2:
             attempts += 1
-            angle = random.uniform(0, math.pi*2)
-            dist  = random.uniform(310,640)
-            px = self.player.x + math.cos(angle)*dist
-            py = self.player.y + math.sin(angle)*dist
-            tx, ty = int(px//TILE), int(py//TILE)
-            if not self.world.walkable(tx, ty): continue
+            # จุดเดินได้สุ่มในวงแหวน 310–640 px รอบผู้เล่น
+            q = self.world.random_walkable(ptx, pty, 310/TILE, 640/TILE)
+            if q is None: continue
+            px, py = q[0]*TILE + TILE//2, q[1]*TILE + TILE//2
             etype = random.choices(pool, weights=weights)[0]
-            self.enemies.append(Enemy(etype, px, py, dm))
+            self.enemies.spawn(etype, px, py, dm)
 
     # ── Attack ──
     def do_attack(self):
@@ -320,9 +366,9 @@ class Game:
 
         hit = False
         rng = p.atk_rng()
-        for e in self.enemies[:]:
+        for e in self.enemies.in_radius(p.x, p.y, rng):
+            if e not in self.enemies: continue
             d = math.hypot(p.x-e.x, p.y-e.y)
-            if d >= rng: continue
             dmg = p.atk_dmg()
             if p.poison_stacks > 0:
                 e.poison += 3; p.poison_stacks -= 1; dmg = int(dmg*1.25)
@@ -350,7 +396,7 @@ class Game:
             tx,ty = int(e.x//TILE), int(e.y//TILE)
             self.world.add_drop(tx, ty, {"id":iid,"qty":qty})
         if e in self.enemies: self.enemies.remove(e)
-        self.ps.emit(e.x, e.y, PAL["ui_gold"], 10, 80, 0.8, 6, True)
+        self.ps.emit(e.x, e.y, PAL["ui_gold"], 10, 80, 0.8, 6, True, emitter="combat")
         self.note(f"⚔ ฆ่า {e.name}! +{e.xp}XP")
         if lv:
             self.note(f"🎉 เลเวลอัพ! Lv.{p.level}!")
@@ -362,7 +408,7 @@ class Game:
         p = self.player
         tx, ty = int(p.x//TILE), int(p.y//TILE)
         for cc in [(tx,ty),(tx+1,ty),(tx-1,ty),(tx,ty+1),(tx,ty-1)]:
-            obj = self.world.objs.get(cc)
+            obj = self.world.obj(*cc)
             if not obj: continue
             power = 2 if p.weapon in ("axe","pickaxe") else 1
             drops = self.world.hit(cc[0], cc[1], power)
@@ -384,22 +430,24 @@ class Game:
 
     def place_item(self):
         p = self.player; px, py = p.x, p.y
-        for iid, lst, msg in [
-            ("campfire", p.campfires, "🔥 วางกองไฟ!"),
-            ("shelter",  p.shelters,  "🏕 สร้างที่พัก!"),
-            ("trap",     p.traps,     "🪤 วางกับดัก!"),
-            ("torch",    p.torches,   "🕯 วางคบเพลิง!"),
-            ("house",    p.houses,    "🏠 สร้างบ้าน!"),
+        for iid, msg in [
+            ("campfire", "🔥 วางกองไฟ!"),
+            ("shelter",  "🏕 สร้างที่พัก!"),
+            ("trap",     "🪤 วางกับดัก!"),
+            ("torch",    "🕯 วางคบเพลิง!"),
+            ("house",    "🏠 สร้างบ้าน!"),
         ]:
             if p.take(iid):
-                lst.append((px,py)); self.note(msg); self.audio.play("click")
+                p.structures.add(iid, px, py); self.note(msg); self.audio.play("click")
                 if iid == "campfire":
                     self.mstats["camp_placed"] = self.mstats.get("camp_placed",0) + 1
                     self._check_missions()
                 return
         # Farm plot: place as dict key
-        if p.take("farm_plot"):
-            p.farm_plots[(px,py)] = {"crop":None,"stage":0,"water":50,"fertilized":False}
+        if p.inv.get("farm_plot",0):
+            if not p.farm.place(px, py, p.clock):
+                self.note("❌ ตรงนี้มีแปลงผักแล้ว"); return
+            p.take("farm_plot")
             self.note("🌱 วางแปลงผัก!"); self.audio.play("click"); return
         self.note("❓ ต้องการ campfire / shelter / trap / torch / house / farm_plot")
 
@@ -416,13 +464,8 @@ class Game:
             if p.water_plot(px, py, self.world):
                 self.note("💧 รดน้ำแปลงผักแล้ว!"); self.audio.play("drink"); return
         # 3. Apply fertilizer
-        if p.inv.get("fertilizer",0):
-            for pos, plot in p.farm_plots.items():
-                fx,fy = pos
-                if math.hypot(px-fx,py-fy) < TILE*1.5 and plot["crop"] and not plot["fertilized"]:
-                    if p.take("fertilizer"):
-                        plot["fertilized"] = True
-                        self.note("🌿 ใส่ปุ๋ยแล้ว! เติบโตเร็วขึ้น 2x"); return
+        if p.fertilize_plot(px, py):
+            self.note("🌿 ใส่ปุ๋ยแล้ว! เติบโตเร็วขึ้น 2x"); return
         # 4. Plant seed (cycle: carrot→potato→cabbage)
         if p.inv.get("veggie_seed",0):
             crops = ["carrot","potato","cabbage"]
@@ -435,14 +478,15 @@ class Game:
                 self.note(f"🌱 ปลูก {ITEM_NAMES.get(result,result)}!"); self.audio.play("click"); return
         self.note("🌾 กด V ใกล้แปลง: ปลูก/รดน้ำ/เก็บเกี่ยว")
 
-    # ── Main loop — fixed timestep + smooth render ──
+    # ── Main loop — fixed-step simulation, interpolated render ──
     def run(self):
         import time
         prev_time = time.perf_counter()
+        acc = 0.0
 
         while self.running:
             now = time.perf_counter()
-            dt  = min(now - prev_time, 0.05)   # cap at 50ms — ป้องกัน dt พุ่ง
+            acc += min(now - prev_time, 0.25)   # ป้องกัน dt พุ่งหลังหน้าต่างค้าง
             prev_time = now
 
             try:
@@ -450,10 +494,16 @@ class Game:
             except Exception as e:
                 import traceback; traceback.print_exc()
 
-            try:
-                self._update(dt)
-            except Exception as e:
-                import traceback; traceback.print_exc()
+            # Fixed-step simulation — as many FIXED_DT steps as real time allows
+            steps = 0
+            while acc >= FIXED_DT and steps < MAX_STEPS:
+                try:
+                    self._update(FIXED_DT)
+                except Exception as e:
+                    import traceback; traceback.print_exc()
+                acc -= FIXED_DT; steps += 1
+            if acc >= FIXED_DT: acc %= FIXED_DT   # too slow to catch up: drop the backlog
+            self.alpha = acc / FIXED_DT
 
             try:
                 self._draw()
@@ -463,6 +513,7 @@ class Game:
             self.frame += 1
             self.clock.tick_busy_loop(FPS)
 
+        self.loader.shutdown()
         pygame.quit(); sys.exit()
 
     # ── Events ──
@@ -681,6 +732,12 @@ class Game:
         if self.player:
             self.mstats["survived"] = self.player.survived
         all_done = all(self.mstats.get(m["key"],0) >= m["goal"] for m in ms)
+        # ภารกิจใกล้ครบ → เริ่มสร้างโลกด่านถัดไปไว้ก่อน
+        nxt = self.cur_stage_id + 1
+        if nxt <= len(STAGES) and not self.loader.prefetched(nxt):
+            prog = sum(min(1.0, self.mstats.get(m["key"],0)/m["goal"]) for m in ms) / len(ms)
+            if prog >= PREFETCH_AT:
+                self.loader.prefetch(nxt, random.randint(1, 99999) + self._get_stage(nxt)["seed_off"])
         if all_done and not self.stage_clear_on and not self.game_clear_on:
             self.stage_clear_on = True
             self.audio.play("levelup")
@@ -696,6 +753,9 @@ class Game:
 
     # ── Update ──
     def _update(self, dt):
+        """One simulation step of dt (FIXED_DT from run())"""
+        self._stepped = False
+        if self.state == "loading": self._poll_loading(); return
         if self.state != "game" or self.paused: return
         # Allow stage-clear screen clicks but no gameplay
         if self.stage_clear_on or self.game_clear_on: return
@@ -704,17 +764,15 @@ class Game:
         p = self.player
         if p is None: return
 
-        # Stage intro countdown
-        if self.stage_intro_t > 0:
-            self.stage_intro_t = max(0, self.stage_intro_t - dt)
+        # Game time: fires due timers (enemy spawns, combo expiry, traps, notifications)
+        dt = self.timers.advance(dt)
+        self._prev = (p, p.x, p.y, self.cam_x, self.cam_y); self._stepped = True
+        self.tick += 1
 
-        keys = pygame.key.get_pressed()
+        keys = self.keys()
         prev_survived = p.survived
         p.update(keys, self.world, dt, self.ps)
 
-        # Farm plot growth
-        p.update_farm_plots(dt)
-
         if p.dead:
             self.state = "gameover"
             self.audio.play("death")
@@ -725,31 +783,38 @@ class Game:
             self.mstats["survived"] = p.survived
             self._check_missions()
 
-        if p.moving and self.frame%22==0:
+        if p.moving and self.tick%22==0:
             # Surface-aware footstep
             tx_s, ty_s = int(p.x//TILE), int(p.y//TILE)
-            tile_t = self.world.tiles[ty_s][tx_s] if 0<=ty_s<self.world.H and 0<=tx_s<self.world.W else TGRASS
+            tile_t = self.world.tile(tx_s, ty_s)
             if tile_t == TROCK:   snd = "step_stone"
             elif tile_t in (TMUD, TSAND): snd = "step_dirt"
             else:                  snd = "step_grass"
             self.audio.play(snd)
 
         # Smooth camera — lerp ที่ใช้ dt จริง ไม่กระตุก
-        tcx = max(0, min(p.x-SW//2, self.world.W*TILE-SW))
-        tcy = max(0, min(p.y-SH//2, self.world.H*TILE-SH))
+        tcx, tcy = p.x-SW//2, p.y-SH//2
+        if self.world.bounded:
+            tcx = max(0, min(tcx, self.world.W*TILE-SW))
+            tcy = max(0, min(tcy, self.world.H*TILE-SH))
         lerp = min(1.0, 8.0 * dt)
         self.cam_x += (tcx-self.cam_x)*lerp
         self.cam_y += (tcy-self.cam_y)*lerp
 
-        # Enemy spawn
-        self.spawn_cd -= dt
-        if self.spawn_cd <= 0:
-            self.spawn_cd = 10.0; self._spawn_enemies()
-
-        # Enemy update
-        for e in self.enemies[:]:
+        # Stream chunks around the view (one chunk of look-ahead each side)
+        ctx, cty = int(self.cam_x)//TILE, int(self.cam_y)//TILE
+        self.world.stream(ctx-CHUNK, cty-CHUNK, ctx+SW//TILE+CHUNK, cty+SH//TILE+CHUNK)
+
+        # Enemy update — one step for all (chasers share one flow field, patrols route
+        # on the cluster graph), then the events in order
+        if self.flow is None or self.flow.world is not self.world:
+            self.flow = FlowField(self.world)
+        if self.nav is None or self.nav.world is not self.world:
+            self.nav = NavGraph(self.world)     # a loaded save — the stage loader builds its own
+        self.nav.pump(NAV_PUMP)
+        self.flow.update(p.x, p.y, dt)
+        for e, res in self.enemies.update(p.x, p.y, self.world, dt, self.flow, self.nav):
             if e not in self.enemies: continue
-            res = e.update(p.x, p.y, self.world, dt)
             if res == "dead":
                 self._kill_enemy(e)
             elif res == "attack":
@@ -763,25 +828,23 @@ class Game:
                     self.note(f"💢 {e.name} โจมตี! -{dmg}HP")
                     if p.hp <= 0:
                         p.dead = True; self.state="gameover"; self.audio.play("death"); return
-            # Clean up dead
-            if e in self.enemies and e.hp <= 0:
-                self._kill_enemy(e)
+        # Clean up dead
+        for e in self.enemies.dead():
+            self._kill_enemy(e)
 
         # Cull distant enemies
-        self.enemies = [e for e in self.enemies
-                        if math.hypot(e.x-p.x, e.y-p.y) < 1400]
+        self.enemies.cull(p.x, p.y, 1400)
 
         self.ps.update(dt)
-        self.notifs = [[m,t-dt,mt] for m,t,mt in self.notifs if t>0]
 
         # Periodic warnings
-        if p.hunger < 20 and self.frame%320==0: self.note("หิวมาก!")
-        if p.thirst < 20 and self.frame%320==1: self.note("กระหายมาก!")
+        if p.hunger < 20 and self.tick%320==0: self.note("หิวมาก!")
+        if p.thirst < 20 and self.tick%320==1: self.note("กระหายมาก!")
 
         # แจ้งเตือนใกล้กลางคืน — เตือนเมื่อ t≈5 (ช่วงพระอาทิตย์ตก)
         t_day = p.gtime % 10
         has_fire = bool(p.campfires) or bool(p.torches)
-        if 4.8 < t_day < 5.2 and self.frame%60==0:
+        if 4.8 < t_day < 5.2 and self.tick%60==0:
             if not has_fire:
                 self.note("ใกล้กลางคืนแล้ว! รีบก่อไฟด่วน!")
             else:
@@ -789,6 +852,7 @@ class Game:
 
     # ── Draw ──
     def _draw(self):
+        if self.headless: return
         try:
             self._draw_inner()
         except Exception as e:
@@ -822,59 +886,55 @@ class Game:
             result = draw_gameover(surf, self.fonts, self.player, mouse, self.frame)
             if result and len(result)==3: self._go = result
 
+        # ─ LOADING ─
+        elif self.state == "loading":
+            draw_loading(surf, self.fonts, self._get_stage(), self.frame)
+
         # ─ GAME ─
         elif self.state == "game":
-            cx, cy = int(self.cam_x), int(self.cam_y)
-
-            # Tiles
-            sx0=max(0,cx//TILE); sy0=max(0,cy//TILE)
-            sx1=min(self.world.W,sx0+SW//TILE+2); sy1=min(self.world.H,sy0+SH//TILE+2)
-            for ty in range(sy0,sy1):
-                for tx in range(sx0,sx1):
-                    t = self.world.tiles[ty][tx]
-                    s = get_tile_surf(t, tx, ty)
-                    surf.blit(s, (tx*TILE-cx, ty*TILE-cy))
-
-            # World objects (draw only on-screen)
-            for (tx,ty),obj in self.world.objs.items():
-                px=tx*TILE-cx+TILE//2; py=ty*TILE-cy+TILE//2
-                if not (-80<px<SW+80 and -100<py<SH+80): continue
-                t = obj["type"]
-                if   t=="tree":     draw_tree(surf,px,py,obj.get("stage",3))
-                elif t=="ore":      draw_ore(surf,px,py,obj.get("stage",2))
-                elif t=="bush":     draw_bush(surf,px,py)
-                elif t=="mushroom": draw_mushroom(surf,px,py)
-                elif t=="reed":     draw_reed(surf,px,py)
-                elif t=="flower":   draw_flower(surf,px,py)
-
-            # Placed structures
-            p = self.player
-            for (fx,fy) in p.campfires:
-                sx,sy=int(fx-cx),int(fy-cy)
-                if -30<sx<SW+30 and -30<sy<SH+30:
-                    draw_campfire(surf,sx,sy,self.ps)
-            for (sx2,sy2) in p.shelters:
-                sx,sy=int(sx2-cx),int(sy2-cy)
-                if -30<sx<SW+30 and -30<sy<SH+30:
-                    draw_shelter(surf,sx,sy)
-            for (tx2,ty2) in p.traps:
-                sx,sy=int(tx2-cx),int(ty2-cy)
-                if 0<sx<SW and 0<sy<SH:
-                    pygame.draw.rect(surf,(80,55,22),(sx-7,sy-3,14,6))
-                    for dx in[-9,9]: pygame.draw.line(surf,PAL["tree_trunk"],(sx,sy),(sx+dx,sy-10),2)
-            for (tx2,ty2) in p.torches:
-                sx,sy=int(tx2-cx),int(ty2-cy)
-                if 0<sx<SW and 0<sy<SH:
-                    draw_torch(surf,sx,sy,self.ps)
+            # Interpolate player and camera between the last two steps
+            p = self.player; ipx, ipy = p.x, p.y; cam_x, cam_y = self.cam_x, self.cam_y
+            a = self.alpha if self._stepped else 1.0
+            if self._prev and self._prev[0] is p:
+                _, px0, py0, cx0, cy0 = self._prev
+                ipx = px0 + (p.x-px0)*a; ipy = py0 + (p.y-py0)*a
+                cam_x = cx0 + (cam_x-cx0)*a; cam_y = cy0 + (cam_y-cy0)*a
+            cx, cy = int(cam_x), int(cam_y)
+
+            # Tiles — baked terrain layer, rebuilt whenever the world changes
+            if self.terrain is None or self.terrain.world is not self.world:
+                self.terrain = TerrainLayer(self.world)
+            self.terrain.draw(surf, cx, cy)
+
+            # World objects (draw only on-screen) — index query, margin for tall sprites,
+            # one baked sprite each, submitted in a single blits call
+            obj_blits = []
+            for (tx,ty),obj in self.world.objs_in_rect((cx-80)//TILE, (cy-80)//TILE,
+                                                       (cx+SW+80)//TILE+1, (cy+SH+100)//TILE+1):
+                spr = obj_sprite(obj["type"], obj.get("stage",1), tx, ty)
+                if spr is None: continue
+                s, ox, oy = spr
+                obj_blits.append((s, (tx*TILE-cx+TILE//2-ox, ty*TILE-cy+TILE//2-oy)))
+            surf.blits(obj_blits, False)
+
+            # Placed structures — only the ones the view rect touches
+            p = self.player; st = p.structures
+            def view(kind, m):
+                for x, y in st.in_rect(kind, cx-m-1, cy-m-1, cx+SW+m+1, cy+SH+m+1):
+                    sx, sy = int(x-cx), int(y-cy)
+                    if -m<sx<SW+m and -m<sy<SH+m: yield sx, sy
+            for sx,sy in view("campfire", 30): draw_campfire(surf,sx,sy,self.ps)
+            for sx,sy in view("shelter", 30):  draw_shelter(surf,sx,sy)
+            for sx,sy in view("trap", 0):
+                pygame.draw.rect(surf,(80,55,22),(sx-7,sy-3,14,6))
+                for dx in[-9,9]: pygame.draw.line(surf,PAL["tree_trunk"],(sx,sy),(sx+dx,sy-10),2)
+            for sx,sy in view("torch", 0):     draw_torch(surf,sx,sy,self.ps)
 
             # Houses
-            for (hx2,hy2) in p.houses:
-                sx,sy=int(hx2-cx),int(hy2-cy)
-                if -60<sx<SW+60 and -60<sy<SH+60:
-                    draw_house(surf,sx,sy)
+            for sx,sy in view("house", 60):    draw_house(surf,sx,sy)
 
             # Farm plots
-            for (fpx,fpy),plot in p.farm_plots.items():
+            for fpx,fpy,plot in p.farm.visible(cx-50, cy-50, cx+SW+50, cy+SH+50, p.clock):
                 sx,sy=int(fpx-cx),int(fpy-cy)
                 if -50<sx<SW+50 and -50<sy<SH+50:
                     draw_farm_plot(surf,sx,sy,plot,self.frame)
@@ -892,12 +952,12 @@ class Game:
             self.ps.draw(surf, cx, cy)
 
             # Enemies
-            for e in self.enemies: e.draw(surf,cx,cy)
+            self.enemies.draw(surf, cx, cy, a)
 
             # Attack range flash
             if p.is_swinging:
                 rng = p.atk_rng()
-                px_s,py_s=int(p.x-cx),int(p.y-cy)
+                px_s,py_s=int(ipx-cx),int(ipy-cy)
                 a=int(60*(1-p.atk_anim))
                 if rng not in self._glow_cache:
                     g = pygame.Surface((rng*2,rng*2),pygame.SRCALPHA)
@@ -908,7 +968,7 @@ class Game:
                 surf.blit(glow,(px_s-rng,py_s-rng),special_flags=pygame.BLEND_ADD)
 
             # Player
-            p.draw(surf, cx, cy, Fs)
+            p.draw(surf, cx + (p.x-ipx), cy + (p.y-ipy), Fs)
 
             # Day/night
             day_night(surf, p, self._night_surf)
@@ -974,8 +1034,8 @@ class Game:
                 surf.blit(ct, (SW//2-ct.get_width()//2, SH//2-75))
 
             # Notifications (stacked, fade)
-            for i,(msg,rem,tot) in enumerate(self.notifs[-4:]):
-                alpha = min(255, int(rem/tot*255*2.5))
+            for i,(msg,end,tot,_) in enumerate(self.notifs[-4:]):
+                alpha = min(255, int((end-self.timers.now)/tot*255*2.5))
                 t = Fs.render(msg, True, PAL["ui_gold"])
                 _nb = pygame.Surface((t.get_width()+20, t.get_height()+8))
                 _nb.set_alpha(min(200,alpha)); _nb.fill((12,22,10))
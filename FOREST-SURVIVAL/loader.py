@@ -0,0 +1,62 @@
+"""
+loader.py — สร้างโลกของด่านใน thread แยก ระหว่างที่หน้าจอโหลดยังวาดอยู่
+
+The worker only builds plain data (World, chunks, spawn point, route graph);
+nothing here touches pygame surfaces, fonts or the display — those stay on the
+main thread.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from config import TILE
+from world import World
+from nav import NavGraph
+
+SPAWN_WARM = 24   # tiles around the spawn generated up front
+
+
+def build_stage_world(seed):
+    """(World, (px, py), NavGraph) — world with the chunks around the spawn already
+    generated, and the route graph over them built"""
+    world = World(seed)
+    tx, ty = world.nearest_walkable(*world.centre())
+    world.ensure(tx - SPAWN_WARM, ty - SPAWN_WARM, tx + SPAWN_WARM, ty + SPAWN_WARM)
+    nav = NavGraph(world); nav.pump()
+    return world, (tx * TILE, ty * TILE), nav
+
+
+class StageLoader:
+    """One background worker building stage worlds.
+
+    request()  → Future for a world that is needed now
+    prefetch() → start building a stage that is probably next; take() claims it
+    sync=True builds inline instead (no thread) — the Future is already done."""
+
+    def __init__(self, sync=False):
+        self.sync = sync
+        self._pool = None if sync else ThreadPoolExecutor(1, thread_name_prefix="stage-loader")
+        self._prefetched = {}   # stage id → Future
+
+    def request(self, seed):
+        if self._pool is None:
+            fut = Future()
+            try: fut.set_result(build_stage_world(seed))
+            except Exception as e: fut.set_exception(e)
+            return fut
+        return self._pool.submit(build_stage_world, seed)
+
+    def prefetch(self, sid, seed):
+        if sid not in self._prefetched:
+            self._prefetched[sid] = self.request(seed)
+
+    def prefetched(self, sid):
+        return sid in self._prefetched
+
+    def take(self, sid):
+        """Prefetched Future for stage sid (or None); other prefetches are dropped"""
+        fut = self._prefetched.pop(sid, None)
+        for f in self._prefetched.values(): f.cancel()
+        self._prefetched.clear()
+        return fut
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
@@ -10,10 +10,19 @@
   config.py    — ค่าคงที่และข้อมูลเกม
   audio.py     — ระบบเสียง (procedural)
   world.py     — สร้างโลกและ tile rendering
+  worldcache.py — cache chunk ของโลกลงดิสก์
+  loader.py    — สร้างโลกของด่านใน thread แยก
   entities.py  — PS, Enemy, Player
+  nav.py       — การหาเส้นทางของศัตรู
+  spatial.py   — กริด spatial hash หาศัตรูที่อยู่ใกล้
+  structures.py — ทะเบียนสิ่งก่อสร้าง + สภาพแวดล้อมรอบผู้เล่น
+  farm.py      — แปลงผัก (การเติบโตคำนวณจากเวลา)
+  timers.py    — timer wheel ของเวลาในเกม
   renderer.py  — วาด objects ในโลก
   ui.py        — HUD, screens, overlays
   game.py      — Game loop หลัก
+  sim.py       — รันเกมแบบ headless (ไม่มีหน้าจอ) สำหรับ soak test
+  bench.py     — micro-benchmarks (python bench.py)
 """
 
 from game import Game
@@ -0,0 +1,734 @@
+"""
+nav.py — การหาเส้นทางของศัตรู (flow field ไล่ตามผู้เล่น, hierarchical A*)
+
+FlowField is one BFS from the player's tile over the passability grid,
+shared by every chasing enemy: each tile stores the neighbour one step
+closer to the player, so steering is a table lookup whatever the horde size.
+NavGraph answers long point-to-point routes (patrols) with hierarchical A*.
+"""
+from array import array
+from collections import deque
+from heapq import heappush, heappop, heapify
+from config import TILE, CHUNK, FLOW_RADIUS, FLOW_PERIOD, NAV_CLUSTER, NAV_CACHE, NAV_REGION
+
+try:
+    import numpy as np
+except ImportError:     # numpy เป็น optional — ไม่มีก็คำนวณทีละช่อง
+    np = None
+
+# 8 neighbours: orthogonal first, diagonals only past two open sides
+_NB = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (1, -1), (-1, 1), (1, 1))
+
+
+class FlowField:
+    """Steps toward a goal tile for every tile within `radius` of it"""
+
+    def __init__(self, world, radius=FLOW_RADIUS, period=FLOW_PERIOD):
+        self.world = world
+        self.radius, self.period = radius, period
+        self.w = 2*radius + 1
+        self.goal = None          # goal tile of the current field
+        self.x0 = self.y0 = 0
+        self.dist = None          # array('i') BFS steps to goal, -1 = unreachable
+        self.next = None          # flat index of the next tile, -1 = none
+        self._ver = -1
+        self._age = period        # seconds since the last build
+
+    def update(self, px, py, dt):
+        """Rebuild for the player at (px,py) if it moved tile or the map changed —
+        no more often than `period`"""
+        self._age += dt
+        g = (int(px // TILE), int(py // TILE))
+        if self._age < self.period or (g == self.goal and self._ver == self.world.walk_ver):
+            return
+        self._age = 0.0
+        self._build(*g)
+
+    def _build(self, gx, gy):
+        R, w = self.radius, self.w
+        x0, y0 = gx - R, gy - R
+        n = w * w
+        walk = bytearray()
+        for ty in range(y0, y0 + w):
+            walk += bytes(self.world.walkable_many([(tx, ty) for tx in range(x0, x0 + w)]))
+        walk[R*w + R] = 1                 # the player's own tile always counts
+        dist = array("i", [-1]) * n
+        g = R*w + R; dist[g] = 0
+        q = deque((g,))
+        while q:
+            i = q.popleft(); d = dist[i] + 1
+            x = i % w
+            for j in ((i - 1) if x > 0 else -1, (i + 1) if x < w - 1 else -1, i - w, i + w):
+                if 0 <= j < n and dist[j] < 0 and walk[j]:
+                    dist[j] = d; q.append(j)
+        self.next = self._next_np(dist, walk) if np is not None else self._next_py(dist, walk)
+        self.dist = dist
+        self.goal, self.x0, self.y0 = (gx, gy), x0, y0
+        self._ver = self.world.walk_ver
+
+    def _next_py(self, dist, walk):
+        w = self.w
+        nxt = array("i", [-1]) * (w * w)
+        for i in range(w * w):
+            if dist[i] <= 0: continue
+            x, y = i % w, i // w
+            best, bd = -1, dist[i]
+            for dx, dy in _NB:
+                ax, ay = x + dx, y + dy
+                if not (0 <= ax < w and 0 <= ay < w): continue
+                j = ay*w + ax
+                if dist[j] < 0 or dist[j] >= bd: continue
+                if dx and dy and not (walk[y*w + ax] and walk[ay*w + x]): continue
+                best, bd = j, dist[j]
+            nxt[i] = best
+        return nxt
+
+    def _next_np(self, dist, walk):
+        w = self.w
+        D = np.frombuffer(dist, np.int32).reshape(w, w).astype(np.float64)
+        D[D < 0] = np.inf
+        W = np.frombuffer(bytes(walk), np.uint8).reshape(w, w).astype(bool)
+        Dp = np.pad(D, 1, constant_values=np.inf)
+        Wp = np.pad(W, 1, constant_values=False)
+        cand = np.empty((8, w, w))
+        for k, (dx, dy) in enumerate(_NB):
+            c = Dp[1+dy:1+dy+w, 1+dx:1+dx+w].copy()
+            if dx and dy:
+                c[~(Wp[1:1+w, 1+dx:1+dx+w] & Wp[1+dy:1+dy+w, 1:1+w])] = np.inf
+            cand[k] = c
+        k = cand.argmin(0)                        # first best in _NB order, like _next_py
+        best = np.take_along_axis(cand, k[None], 0)[0]
+        ys, xs = np.mgrid[0:w, 0:w]
+        off = np.array([dy*w + dx for dx, dy in _NB])
+        nxt = (ys*w + xs + off[k]).astype(np.int32)
+        nxt[~((best < D) & np.isfinite(D) & (D > 0))] = -1
+        return array("i", nxt.ravel().tobytes())
+
+    # ── Steering ──
+    def step(self, x, y):
+        """Pixel centre of the next tile toward the goal from (x,y), or None
+        (outside the field, unreachable, or already next to the goal)"""
+        if self.next is None: return None
+        lx, ly = int(x // TILE) - self.x0, int(y // TILE) - self.y0
+        if not (0 <= lx < self.w and 0 <= ly < self.w): return None
+        i = ly*self.w + lx
+        if self.dist[i] <= 1: return None
+        j = self.next[i]
+        if j < 0: return None
+        return ((self.x0 + j % self.w) * TILE + TILE/2, (self.y0 + j // self.w) * TILE + TILE/2)
+
+    def step_np(self, x, y):
+        """Vectorised step() → (has, sx, sy) arrays"""
+        has = np.zeros(len(x), bool)
+        sx = np.zeros(len(x)); sy = np.zeros(len(x))
+        if self.next is None: return has, sx, sy
+        w = self.w
+        lx = (x // TILE).astype(np.int64) - self.x0
+        ly = (y // TILE).astype(np.int64) - self.y0
+        inside = (lx >= 0) & (lx < w) & (ly >= 0) & (ly < w)
+        i = np.where(inside, ly*w + lx, 0)
+        dist = np.frombuffer(self.dist, np.int32)[i]
+        j = np.frombuffer(self.next, np.int32)[i]
+        has = inside & (dist > 1) & (j >= 0)
+        sx = (self.x0 + j % w) * TILE + TILE/2
+        sy = (self.y0 + j // w) * TILE + TILE/2
+        return has, sx, sy
+
+
+# ─────────────────────────────────────────────────────
+#  HIERARCHICAL A* — long routes over the passability grid
+# ─────────────────────────────────────────────────────
+_FAR = 0xFFFF   # "unreachable" in a region's distance rows
+
+
+class NavGraph:
+    """Two-level HPA*: the map is cut into k×k clusters; neighbouring clusters
+    connect through transition tiles on their shared border, and each cluster
+    knows the walking distance between its own transitions. R×R clusters make
+    a region, whose ports (transitions with an edge out of it) know the
+    distance to every transition inside. A route is an A* over the ports —
+    over the transitions when it stays in one region — refined tile by tile
+    by walk() one leg at a time, as the walker gets there.
+
+    Nothing is built inside a query: pump() builds clusters once their chunks
+    and their neighbours' are loaded, then regions whose clusters are all
+    built, a few pieces per call. A query that runs into unbuilt parts gets
+    None, is not remembered, and moves them to the front of the line. A
+    chunk unloading drops its clusters, so the graph only covers the loaded
+    world. When a tile's passability changes, its cluster (and a border it
+    sits on) and region are rebuilt and cached routes through them dropped;
+    a tile opening also drops every cached "unreachable"."""
+    SHORT = 8          # manhattan distance below which a plain tile A* is tried first
+    HW    = 1.2        # heuristic weight — >1 trades a little path length for far fewer expansions
+    WIDE  = 5          # open border runs longer than this get a crossing at each end
+
+    def __init__(self, world, k=NAV_CLUSTER, cache_size=NAV_CACHE, region=NAV_REGION):
+        self.world, self.k, self.R = world, k, region
+        self.edges   = {}     # node tile → {node tile: steps}
+        self.borders = {}     # ("h"|"v", cx, cy) → [(tile, tile)] transitions to the right/down neighbour
+        self.built   = set()  # clusters whose internal edges exist
+        self._grid   = {}     # cluster → bytes k*k, 1 = walkable
+        self._cnodes = {}     # built cluster → its transition tiles
+        self._dist   = {}     # transition tile → array('h') steps to it from each tile of its cluster
+        self.ports   = {}     # built region → {port tile: column in _row}
+        self.edges2  = {}     # port → {port: steps} inside its region and across to the next
+        self._row    = {}     # transition of a built region → array('H') steps to each port (_FAR = none)
+        self._rnodes = {}     # built region → its transitions
+        self._todo   = {}     # clusters waiting to be built, in order (dict as ordered set)
+        self._hot    = {}     # … of those, the ones a query or a repair is waiting on
+        self._rtodo  = {}     # region → None (queued) | [transitions, adjacency, ports, columns] (building)
+        self._busy   = False  # something was queued since pump() last ran dry
+        self._cache  = {}     # (start, goal) → ((nodes, tiles | None, top), clusters | ("r", region))
+        self._by_cl  = {}     # cluster or ("r", region) → {(start, goal)} cached through it
+        self._none   = set()  # (start, goal) found unreachable — any tile opening clears it
+        self.cache_size = cache_size
+        self.stats = {"hits": 0, "misses": 0, "waits": 0, "repairs": 0}
+        world.walk_listeners.append(self._on_walk)
+        world.chunk_listeners.append(self._on_chunk)
+        for cx, cy in list(world.chunks): self._on_chunk(cx, cy, True)
+
+    def _cl(self, t):
+        return (t[0] // self.k, t[1] // self.k)
+
+    def _rg(self, t):
+        return (t[0] // (self.k*self.R), t[1] // (self.k*self.R))
+
+    def _rc(self, c):
+        return (c[0] // self.R, c[1] // self.R)
+
+    def _cells(self, c):
+        g = self._grid.get(c)
+        if g is None:
+            k = self.k; x0, y0 = c[0]*k, c[1]*k
+            g = bytearray()
+            for ty in range(y0, y0 + k):
+                g += bytes(self.world.walkable_many([(tx, ty) for tx in range(x0, x0 + k)]))
+            g = self._grid[c] = bytes(g)
+        return g
+
+    def _adj(self, c):
+        """Walkable 4-neighbours of each tile of cluster c, by index inside it"""
+        k = self.k; g = self._cells(c); n = k*k; out = []
+        for i in range(n):
+            if not g[i]: out.append(()); continue
+            x = i % k
+            out.append([j for j in ((i - 1) if x > 0 else -1, (i + 1) if x < k - 1 else -1, i - k, i + k)
+                        if 0 <= j < n and g[j]])
+        return out
+
+    # ── Graph ──
+    def _border(self, key):
+        tr = self.borders.get(key)
+        if tr is not None: return tr
+        d, cx, cy = key; k = self.k
+        a = (cx, cy); b = (cx+1, cy) if d == "h" else (cx, cy+1)
+        ga, gb = self._cells(a), self._cells(b)
+        tr, run = [], []
+        for t in range(k + 1):
+            if t < k:
+                ia, ib = (t*k + k-1, t*k) if d == "h" else ((k-1)*k + t, t)
+                if ga[ia] and gb[ib]: run.append(t); continue
+            if run:   # one crossing per open run — two for wide ones
+                for t0 in ((run[len(run)//2],) if len(run) <= self.WIDE else (run[0], run[-1])):
+                    if d == "h": tr.append(((cx*k + k-1, cy*k + t0), ((cx+1)*k, cy*k + t0)))
+                    else:        tr.append(((cx*k + t0, cy*k + k-1), (cx*k + t0, (cy+1)*k)))
+                run = []
+        for u, v in tr:
+            self.edges.setdefault(u, {})[v] = 1
+            self.edges.setdefault(v, {})[u] = 1
+        self.borders[key] = tr
+        if self._rc(a) != self._rc(b):   # the ports of both regions change
+            self._dirty(self._rc(a)); self._dirty(self._rc(b))
+        return tr
+
+    @staticmethod
+    def _border_keys(c):
+        cx, cy = c
+        return (("h", cx, cy), ("h", cx-1, cy), ("v", cx, cy), ("v", cx, cy-1))
+
+    def _nodes(self, c):
+        out = set()
+        for key in self._border_keys(c):
+            for u, v in self._border(key):
+                out.add(u if self._cl(u) == c else v)
+        return out
+
+    def _build(self, c):
+        nodes = self._cnodes[c] = list(self._nodes(c))
+        nb = self._adj(c)
+        at = [self._li(c, v) for v in nodes]
+        D = []
+        for u in nodes:
+            dist, _ = self._bfs(c, u, nb=nb)
+            self._dist[u] = array("h", dist)
+            D.append([dist[j] for j in at])
+        # keep only edges no other node of the cluster lies on — same distances, far fewer edges
+        n = len(nodes)
+        for a in range(n):
+            Da = D[a]; e = self.edges.setdefault(nodes[a], {})
+            for b in range(n):
+                d = Da[b]
+                if d <= 0: continue
+                if not any(Da[w] > 0 and D[w][b] > 0 and Da[w] + D[w][b] == d for w in range(n)):
+                    e[nodes[b]] = d
+        self.built.add(c)
+        self._rtodo.setdefault(self._rc(c), None)
+
+    def _li(self, c, t):
+        return (t[1] - c[1]*self.k)*self.k + (t[0] - c[0]*self.k)
+
+    def _bfs(self, c, src, parents=False, nb=None):
+        """Steps from src to every tile of cluster c (-1 = unreachable)"""
+        if nb is None: nb = self._adj(c)
+        n = self.k*self.k; s = self._li(c, src)
+        dist = [-1] * n; dist[s] = 0
+        par = [-1] * n if parents else None
+        front, d = [s], 0
+        while front:
+            d += 1; nxt = []
+            for i in front:
+                for j in nb[i]:
+                    if dist[j] < 0:
+                        dist[j] = d; nxt.append(j)
+                        if parents: par[j] = i
+            front = nxt
+        return dist, par
+
+    # ── Regions ──
+    def _rclusters(self, r):
+        R = self.R; k = self.k
+        return [(cx, cy) for cy in range(r[1]*R, r[1]*R + R) for cx in range(r[0]*R, r[0]*R + R)
+                if self.world.in_bounds(cx*k, cy*k)]
+
+    def _rstart(self, r, cls):
+        nodes = [u for c in cls for u in self._cnodes[c]]
+        idx = {u: i for i, u in enumerate(nodes)}
+        adj, ports = [], []
+        for i, u in enumerate(nodes):
+            a = []; out = False
+            for v, d in self.edges.get(u, {}).items():
+                if self._rg(v) != r: out = True
+                elif v in idx: a.append((idx[v], d))
+            adj.append(a)
+            if out: ports.append(i)
+        return [nodes, adj, ports, []]
+
+    @staticmethod
+    def _rsearch(adj, s, port):
+        """Dijkstra over a region from s → (steps, via): via[i] = a shortest way
+        to i passes another port, so s needs no edge of its own to it"""
+        n = len(adj)
+        dist = [_FAR] * n; via = bytearray(n); dist[s] = 0
+        h = [(0, s)]
+        while h:
+            d, i = heappop(h)
+            if d > dist[i]: continue
+            f = via[i] or (port[i] and i != s)
+            for j, c in adj[i]:
+                nd = d + c
+                if nd < dist[j]: dist[j] = nd; via[j] = f; heappush(h, (nd, j))
+                elif nd == dist[j] and f: via[j] = 1
+        return dist, via
+
+    def _rstep(self):
+        """One piece of region work (a port's search, or the finish) → False if none is ready"""
+        for r in list(self._rtodo):
+            cls = self._rclusters(r)
+            if not any(c in self.built or c in self._todo or c in self._hot for c in cls):
+                del self._rtodo[r]; continue     # nothing of it is loaded (or on the map)
+            if not all(c in self.built for c in cls): continue
+            st = self._rtodo[r]
+            if st is None: st = self._rtodo[r] = self._rstart(r, cls)
+            nodes, adj, ports, cols = st
+            if len(cols) < len(ports):
+                port = bytearray(len(nodes))
+                for i in ports: port[i] = 1
+                cols.append(self._rsearch(adj, ports[len(cols)], port))
+                return True
+            del self._rtodo[r]
+            self.ports[r] = {nodes[i]: j for j, i in enumerate(ports)}
+            self._rnodes[r] = nodes
+            for i, u in enumerate(nodes):
+                self._row[u] = array("H", [dist[i] for dist, _ in cols])
+            for j, i in enumerate(ports):
+                dist, via = cols[j]
+                e = self.edges2[nodes[i]] = {nodes[x]: dist[x] for x in ports
+                                             if x != i and dist[x] < _FAR and not via[x]}
+                for v, d in self.edges[nodes[i]].items():
+                    if self._rg(v) != r: e[v] = d
+            return True
+        return False
+
+    def _dirty(self, r):
+        """Drop region r's tables and routes planned over them; queue it again"""
+        if self.ports.pop(r, None) is not None:
+            for u in self._rnodes.pop(r):
+                self._row.pop(u, None); self.edges2.pop(u, None)
+            self._forget((("r",) + r,))
+        self._rtodo[r] = None
+        self._busy = True
+
+    # ── Building ──
+    def _ready(self, c):
+        """Cluster c and the border tiles of its neighbours are all in loaded chunks"""
+        k = self.k
+        x0, y0, x1, y1 = self.world.clamp_rect(c[0]*k - 1, c[1]*k - 1, c[0]*k + k + 1, c[1]*k + k + 1)
+        chunks = self.world.chunks
+        return all((cx, cy) in chunks for cy in range(y0 // CHUNK, (y1 - 1) // CHUNK + 1)
+                   for cx in range(x0 // CHUNK, (x1 - 1) // CHUNK + 1))
+
+    def _want(self, *cs):
+        """Build these clusters first (those whose chunk is loaded)"""
+        for c in cs:
+            if c in self._todo:
+                del self._todo[c]; self._hot[c] = None; self._busy = True
+
+    def pump(self, steps=None):
+        """Build up to `steps` pieces — a cluster, or one port of a region —
+        waited-on clusters first, then the rest, then regions; all that is
+        ready if None. → pieces built"""
+        done = 0
+        while self._busy and (steps is None or done < steps):
+            c = next((c for q in (self._hot, self._todo) for c in q if self._ready(c)), None)
+            if c is not None:
+                self._hot.pop(c, None); self._todo.pop(c, None)
+                self._build(c)
+            elif not self._rstep():
+                self._busy = False; break
+            done += 1
+        return done
+
+    def _on_chunk(self, cx, cy, loaded):
+        """A chunk loaded (queue its clusters) or unloaded (drop them)"""
+        n = CHUNK // self.k; k = self.k
+        cs = [(x, y) for y in range(cy*n, cy*n + n) for x in range(cx*n, cx*n + n)
+              if self.world.in_bounds(x*k, y*k)]
+        if loaded:
+            for c in cs:
+                if c not in self.built: self._todo[c] = None
+            self._busy = True
+            return
+        for c in cs:
+            self._todo.pop(c, None); self._hot.pop(c, None)
+            self._unbuild(c)
+            for key in self._border_keys(c): self._drop_border(key)
+            self._grid.pop(c, None)
+        self._forget(cs)
+
+    # ── Queries ──
+    def _lookup(self, start, goal):
+        """Cached (nodes, tiles | None, top) for start→goal, planned on a miss; None if
+        unreachable or not built yet. tiles is the whole path for short routes; long
+        ones keep only the abstract nodes — ports when top, else transitions."""
+        key = (start, goal)
+        if key in self._none:
+            self.stats["hits"] += 1
+            return None
+        hit = self._cache.get(key)
+        if hit is not None:
+            self.stats["hits"] += 1
+            return hit[0]
+        self.stats["misses"] += 1
+        ent = None
+        if self.world.walkable(*goal):
+            if abs(start[0]-goal[0]) + abs(start[1]-goal[1]) <= self.SHORT:
+                p = self._short(start, goal)
+                if p is not None: ent = ((start, goal), tuple(p), False)
+            if ent is None:
+                r = self.route(start, goal)
+                if r == ():
+                    self.stats["waits"] += 1
+                    return None
+                if r is not None: ent = (tuple(r[0]), None, r[1])
+        self._remember(key, ent)
+        return ent
+
+    def walk(self, start, goal):
+        """Route from start to goal, refined to tiles one leg at a time — or None"""
+        ent = self._lookup(start, goal)
+        return None if ent is None else Route(self, *ent)
+
+    def path(self, start, goal):
+        """Tiles to walk from start to goal (start excluded), or None if unreachable"""
+        ent = self._lookup(start, goal)
+        if ent is None: return None
+        return list(ent[1]) if ent[1] is not None else self._refine(ent[0], ent[2])
+
+    def route(self, start, goal):
+        """Abstract route (nodes, top) — [start, port…, goal] when top, else
+        [start, transition…, goal] — not refined; None if unreachable, () if
+        the search ran into parts of the graph not built yet"""
+        cs, cg = self._cl(start), self._cl(goal)
+        if cs not in self.built or cg not in self.built:
+            self._want(cs, cg); return ()
+        rs, rg = self._rg(start), self._rg(goal)
+        if rs != rg and rs in self.ports and rg in self.ports:
+            nodes = self._astar2(start, goal, rs, rg)
+            if nodes != (): return nodes and (nodes, True)
+        s_links = self._links(cs, start)
+        g_links = self._links(cg, goal)
+        if cs == cg:
+            ds, _ = self._bfs(cs, start)
+            if ds[self._li(cs, goal)] >= 0: s_links[goal] = ds[self._li(cs, goal)]
+        nodes = self._astar(start, goal, s_links, g_links)
+        return nodes and (nodes, False)
+
+    def _links(self, c, t):
+        """{transition: steps} reachable from tile t inside its (built) cluster"""
+        i = self._li(c, t); out = {}
+        for v in self._cnodes[c]:
+            d = self._dist[v][i]
+            if d >= 0: out[v] = d
+        return out
+
+    def _side(self, t, r):
+        """{port of region r: steps from tile t}"""
+        row = self._row
+        rows = [[d + x for x in row[a]] for a, d in self._links(self._cl(t), t).items()]
+        if not rows: return {}
+        return {p: m for p, m in zip(self.ports[r], map(min, zip(*rows))) if m < _FAR}
+
+    def _astar(self, s, g, s_links, g_links):
+        gx, gy = g; hw = self.HW; built = self.built; k = self.k
+        best = {s: 0}; came = {}; miss = set()
+        openh = [((abs(s[0]-gx) + abs(s[1]-gy))*hw, 0, s)]
+        while openh:
+            _, d, u = heappop(openh)
+            if u == g:
+                out = [u]
+                while u in came: u = came[u]; out.append(u)
+                return out[::-1]
+            if d > best[u]: continue
+            if u == s: nb = s_links.items()
+            else:
+                c = (u[0] // k, u[1] // k)
+                if c not in built: miss.add(c)     # only its border edges so far
+                nb = self.edges.get(u, {}).items()
+                gl = g_links.get(u)
+                if gl is not None: nb = list(nb) + [(g, gl)]
+            for v, c in nb:
+                nd = d + c
+                if nd < best.get(v, 1 << 30):
+                    best[v] = nd; came[v] = u
+                    heappush(openh, (nd + (abs(v[0]-gx) + abs(v[1]-gy))*hw, nd, v))
+        if miss:
+            self._want(*miss); return ()
+        return None
+
+    def _astar2(self, s, g, rs, rg):
+        """A* over the ports: [s, port…, g], None if unreachable, () if it ran
+        into a region not built yet"""
+        s2, g2 = self._side(s, rs), self._side(g, rg)
+        gx, gy = g; hw = self.HW; E2 = self.edges2
+        best = dict(s2); came = {}; miss = False
+        openh = [(d + (abs(v[0]-gx) + abs(v[1]-gy))*hw, d, v) for v, d in s2.items()]
+        heapify(openh)
+        bget, push = best.get, heappush
+        top, end = 1 << 30, None
+        while openh:
+            f, d, u = heappop(openh)
+            if f >= top: break
+            if d > best[u]: continue
+            x = g2.get(u)
+            if x is not None and d + x < top: top, end = d + x, u
+            nb = E2.get(u)
+            if nb is None: miss = True; continue
+            for v, c in nb.items():
+                nd = d + c
+                if nd < bget(v, top):     # nothing at or past the best goal found can help
+                    best[v] = nd; came[v] = u
+                    push(openh, (nd + (abs(v[0]-gx) + abs(v[1]-gy))*hw, nd, v))
+        if end is None: return () if miss else None
+        out = [g, end]; u = end
+        while u in came: u = came[u]; out.append(u)
+        out.append(s)
+        return out[::-1]
+
+    def _refine(self, nodes, top=False):
+        r = Route(self, nodes, top=top); out = []
+        t = r.next()
+        while t is not None: out.append(t); t = r.next()
+        return out if r.leg < len(nodes) else None
+
+    def _expand(self, nodes, i):
+        """Transitions walked on port-level leg i (nodes[i] excluded); None if
+        its region's tables changed since the route was planned"""
+        u, v = nodes[i], nodes[i+1]
+        r = self._rg(u)
+        if r != self._rg(v): return [v]        # across a region border — one graph edge
+        ports = self.ports.get(r)
+        if ports is None: return None
+        row = self._row
+        if i == 0 or i == len(nodes) - 2:       # start → first port, last port → goal
+            t, p = (u, v) if i == 0 else (v, u)
+            col = ports.get(p); c = self._cl(t)
+            if col is None or c not in self.built: return None
+            links = self._links(c, t)
+            a = min(links, key=lambda a: links[a] + row[a][col], default=None)
+            if a is None or row[a][col] >= _FAR: return None
+            seq = self._down(a, col, r)
+            if seq is None: return None
+            return seq if i == 0 else seq[-2::-1] + [v]
+        col = ports.get(v)
+        seq = self._down(u, col, r) if col is not None and u in row else None
+        return seq and seq[1:]
+
+    def _down(self, a, col, r):
+        """Transitions from a down port column `col` of region r to that port (a included)"""
+        row, E = self._row, self.edges
+        out = [a]; d = row[a][col]
+        while d:
+            for b, c in E.get(a, {}).items():
+                rb = row.get(b)
+                if rb is not None and self._rg(b) == r and rb[col] + c == d: break
+            else: return None
+            a, d = b, d - c; out.append(a)
+        return out
+
+    def _leg(self, u, v):
+        """Tiles from node u to the next node v (u excluded); None if the map
+        has changed since the route was planned and v is cut off"""
+        cu = self._cl(u)
+        if cu != self._cl(v):       # border crossing — neighbouring tiles
+            return [v] if self.world.walkable(*v) else None
+        i, j = self._li(cu, u), self._li(cu, v)
+        T = self._dist.get(v)
+        if T is not None: return self._descend(cu, T, u) if T[i] >= 0 else None
+        T = self._dist.get(u)
+        if T is not None: return self._descend(cu, T, v)[-2::-1] + [v] if T[j] >= 0 else None
+        dist, par = self._bfs(cu, u, parents=True)
+        if dist[j] < 0: return None
+        seg = []; k = self.k
+        while j != i:
+            seg.append((cu[0]*k + j % k, cu[1]*k + j // k)); j = par[j]
+        return seg[::-1]
+
+    def _descend(self, c, T, t):
+        """Tiles from t down the distance table T to its zero (t excluded)"""
+        k = self.k; x0, y0 = c[0]*k, c[1]*k
+        i = self._li(c, t); d = T[i]; out = []
+        while d > 0:
+            x = i % k
+            for j in ((i - 1) if x > 0 else -1, (i + 1) if x < k - 1 else -1, i - k, i + k):
+                if 0 <= j < k*k and T[j] == d - 1: break
+            i, d = j, d - 1
+            out.append((x0 + i % k, y0 + i // k))
+        return out
+
+    def _short(self, start, goal, budget=96):
+        """Plain tile A* for nearby goals; None if it runs out of budget"""
+        gx, gy = goal
+        walk = self.world.walkable
+        best = {start: 0}; came = {}
+        openh = [(abs(start[0]-gx) + abs(start[1]-gy), 0, start)]
+        while openh and budget:
+            budget -= 1
+            _, d, u = heappop(openh)
+            if u == goal:
+                out = []
+                while u != start: out.append(u); u = came[u]
+                return out[::-1]
+            if d > best[u]: continue
+            x, y = u
+            for v in ((x-1, y), (x+1, y), (x, y-1), (x, y+1)):
+                if d + 1 < best.get(v, 1 << 30) and walk(*v):
+                    best[v] = d + 1; came[v] = u
+                    heappush(openh, (d + 1 + abs(v[0]-gx) + abs(v[1]-gy), d + 1, v))
+        return None
+
+    # ── Cache / repair ──
+    def _remember(self, key, ent):
+        if ent is None:
+            # a wall opening anywhere may connect it, so it is not filed by cluster
+            if len(self._none) >= self.cache_size: self._none.clear()
+            self._none.add(key); return
+        if len(self._cache) >= self.cache_size:
+            old = next(iter(self._cache))
+            for c in self._cache.pop(old)[1]: self._by_cl.get(c, set()).discard(old)
+        nodes, tiles, top = ent   # every refined leg stays inside its nodes' clusters — or regions
+        if top: cls = {("r",) + self._rg(t) for t in nodes}
+        else:   cls = {self._cl(t) for t in nodes} | ({self._cl(t) for t in tiles} if tiles else set())
+        self._cache[key] = (ent, cls)
+        for c in cls: self._by_cl.setdefault(c, set()).add(key)
+
+    def _forget(self, cls):
+        """Drop cached routes through these clusters / ("r", region)s"""
+        stale = set()
+        for c in cls: stale |= self._by_cl.pop(c, set())
+        for key in stale:
+            ent = self._cache.pop(key, None)
+            if ent:
+                for cc in ent[1]: self._by_cl.get(cc, set()).discard(key)
+
+    def _unbuild(self, c):
+        if c not in self.built: return
+        nodes = self._cnodes.pop(c)
+        for u in nodes:
+            self._dist.pop(u, None)
+            e = self.edges.get(u)
+            if e is not None:
+                for v in nodes: e.pop(v, None)
+                if not e: del self.edges[u]
+        self.built.discard(c)
+        self._dirty(self._rc(c))
+
+    def _drop_border(self, key):
+        for u, v in self.borders.pop(key, ()):
+            for a, b in ((u, v), (v, u)):
+                e = self.edges.get(a)
+                if e is not None:
+                    e.pop(b, None)
+                    if not e: del self.edges[a]
+
+    def _on_walk(self, tx, ty):
+        """A tile changed passability — rebuild its cluster, and a border it lies on"""
+        if self.world.walkable(tx, ty): self._none.clear()
+        k = self.k; c = self._cl((tx, ty))
+        lx, ly = tx - c[0]*k, ty - c[1]*k
+        keys = []
+        if lx == k-1: keys.append(("h", c[0], c[1]))
+        if lx == 0:   keys.append(("h", c[0]-1, c[1]))
+        if ly == k-1: keys.append(("v", c[0], c[1]))
+        if ly == 0:   keys.append(("v", c[0], c[1]-1))
+        dirty = {c}
+        for d, bx, by in keys: dirty.add((bx, by)); dirty.add((bx+1, by) if d == "h" else (bx, by+1))
+        if c not in self._grid and not (dirty & self.built): return   # never looked at
+        self.stats["repairs"] += 1
+        for d in dirty:
+            if d in self.built: self._unbuild(d); self._todo[d] = None
+        for key in keys: self._drop_border(key)
+        self._grid.pop(c, None)
+        self._forget(dirty)
+        self._want(*dirty)
+
+
+class Route:
+    """A NavGraph route handed out tile by tile: each leg between two abstract
+    nodes is refined only when the walker reaches it — a port-level leg first
+    to transitions, each of those to tiles — so planning a patrol costs the
+    abstract A* plus one leg."""
+    __slots__ = ("g", "nodes", "top", "leg", "at", "hops", "tiles")
+
+    def __init__(self, g, nodes, tiles=None, top=False):
+        self.g, self.nodes, self.top = g, nodes, top
+        self.tiles = list(reversed(tiles)) if tiles is not None else []   # current leg, next tile last
+        self.leg = len(nodes) - 1 if tiles is not None else 0             # legs refined so far
+        self.at = nodes[0]    # last transition reached
+        self.hops = []        # transitions left on the current leg, next one last
+
+    def __bool__(self):
+        return bool(self.tiles) or bool(self.hops) or self.leg < len(self.nodes) - 1
+
+    def next(self):
+        """Next tile to walk to, or None once walked — or if the map cut the route off"""
+        while not self.tiles:
+            if not self.hops:
+                if self.leg >= len(self.nodes) - 1: return None
+                hops = self.g._expand(self.nodes, self.leg) if self.top else [self.nodes[self.leg + 1]]
+                if hops is None: self.leg = len(self.nodes); return None
+                self.leg += 1; self.hops = hops[::-1]
+            v = self.hops.pop()
+            seg = self.g._leg(self.at, v)
+            if seg is None: self.leg = len(self.nodes); self.hops = []; return None
+            self.at = v; self.tiles = seg[::-1]
+        return self.tiles.pop()
@@ -4,7 +4,7 @@ renderer.py — วาด objects ในโลก (trees, ores, campfire, shelte
 import math
 import random
 import pygame
-from config import PAL, TILE
+from config import PAL
 
 def draw_tree(surf, x, y, stage=3):
     """Draw a layered tree — more realistic multi-blob canopy"""
@@ -32,7 +32,7 @@ def draw_bush(surf, x, y):
     for bx,by in [(-6,-2),(5,-3),(0,4),(-2,-7),(7,2)]:
         pygame.draw.circle(surf, (195,55,75), (x+bx, y+by), 3)
 
-def draw_ore(surf, x, y, stage=2):
+def draw_ore(surf, x, y, stage=2, rng=random):
     """Rocky ore outcrop"""
     pygame.draw.ellipse(surf, PAL["shadow"], (x-18, y+12, 36, 8))
     cols = [(95,95,102),(110,110,118),(130,130,138)]
@@ -41,9 +41,9 @@ def draw_ore(surf, x, y, stage=2):
     # Iron veins if ore
     if stage > 1:
         for _ in range(3):
-            ex = x + random.randint(-10,10)
-            ey = y + random.randint(-8,4)
-            pygame.draw.circle(surf, (160,120,60), (ex,ey), random.randint(2,4))
+            ex = x + rng.randint(-10,10)
+            ey = y + rng.randint(-8,4)
+            pygame.draw.circle(surf, (160,120,60), (ex,ey), rng.randint(2,4))
 
 def draw_mushroom(surf, x, y):
     pygame.draw.rect(surf, (220,200,175), (x-3, y, 6, 10))
@@ -55,25 +55,62 @@ def draw_reed(surf, x, y):
         pygame.draw.line(surf, (110,160,65), (x+dx, y+10), (x+dx+dx//2, y-16), 2)
         pygame.draw.ellipse(surf, (145,100,45), (x+dx-3, y-22, 6, 12))
 
-def draw_flower(surf, x, y):
+def draw_flower(surf, x, y, rng=random):
     for i in range(6):
         a = i*math.pi/3
         px, py = x+int(math.cos(a)*5), y+int(math.sin(a)*5)
-        col = random.choice([(220,80,80),(220,180,50),(80,120,220),(180,80,200)])
+        col = rng.choice([(220,80,80),(220,180,50),(80,120,220),(180,80,200)])
         pygame.draw.circle(surf, col, (px,py), 3)
     pygame.draw.circle(surf, (240,220,60), (x,y), 4)
 
+# ─────────────────────────────────────────────────────
+#  BAKED OBJECT SPRITES — each (type, stage, variant) drawn once
+# ─────────────────────────────────────────────────────
+_OBJ_DRAW = {
+    "tree":     lambda s, x, y, st, rng: draw_tree(s, x, y, st),
+    "ore":      lambda s, x, y, st, rng: draw_ore(s, x, y, st, rng),
+    "bush":     lambda s, x, y, st, rng: draw_bush(s, x, y),
+    "mushroom": lambda s, x, y, st, rng: draw_mushroom(s, x, y),
+    "reed":     lambda s, x, y, st, rng: draw_reed(s, x, y),
+    "flower":   lambda s, x, y, st, rng: draw_flower(s, x, y, rng),
+}
+OBJ_VARIANTS = {"ore": 4, "flower": 4}   # types whose look has random detail
+_SPR_BOX, _SPR_ANCHOR = (96, 128), (48, 96)
+_sprite_cache = {}   # (type, stage, variant) → (Surface, ox, oy)
+
+def _bake_obj(otype, stage, variant):
+    canvas = pygame.Surface(_SPR_BOX, pygame.SRCALPHA)
+    ax, ay = _SPR_ANCHOR
+    _OBJ_DRAW[otype](canvas, ax, ay, stage, random.Random(f"{otype}:{stage}:{variant}"))
+    r = canvas.get_bounding_rect()
+    return canvas.subsurface(r).copy(), ax - r.x, ay - r.y
+
+def obj_sprite(otype, stage, tx, ty):
+    """(Surface, ox, oy) for a world object — blit at (px-ox, py-oy).
+    The variant comes from the tile so a tile always looks the same.
+    None for types with no sprite."""
+    if otype not in _OBJ_DRAW: return None
+    key = (otype, stage, (tx * 7 + ty * 3) % OBJ_VARIANTS.get(otype, 1))
+    spr = _sprite_cache.get(key)
+    if spr is None:
+        spr = _sprite_cache[key] = _bake_obj(*key)
+    return spr
+
+_fire_glow = None   # baked on first campfire
+
 def draw_campfire(surf, x, y, ps):
     pygame.draw.circle(surf, (60,55,50), (x, y+10), 12)
     for i, (ox,s) in enumerate([(-8,0),(8,0),(0,-4)]):
         pygame.draw.line(surf, PAL["tree_trunk"], (x+ox, y+10), (x, y-2), 3)
     ps.fire(x, y-2)
-    _glow = pygame.Surface((80,80))
-    _glow.set_colorkey((0,0,0))
-    _glow.set_alpha(30)
-    _glow.fill((0,0,0))
-    pygame.draw.circle(_glow, (255,140,40), (40,40), 38)
-    surf.blit(_glow, (x-40, y-40), special_flags=pygame.BLEND_ADD)
+    global _fire_glow
+    if _fire_glow is None:
+        _fire_glow = pygame.Surface((80,80))
+        _fire_glow.set_colorkey((0,0,0))
+        _fire_glow.set_alpha(30)
+        _fire_glow.fill((0,0,0))
+        pygame.draw.circle(_fire_glow, (255,140,40), (40,40), 38)
+    surf.blit(_fire_glow, (x-40, y-40), special_flags=pygame.BLEND_ADD)
 
 def draw_shelter(surf, x, y):
     pygame.draw.polygon(surf, (90,58,22), [(x-28,y+18),(x+28,y+18),(x,y-20)])
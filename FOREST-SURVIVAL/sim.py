@@ -0,0 +1,96 @@
+"""
+sim.py — รันเกมแบบไม่มีหน้าจอ (headless) เร็วเท่าที่ CPU ไหว
+
+  from sim import Sim
+  s = Sim(seed=123)
+  s.hold(pygame.K_d); s.step(600)
+  print(s.snapshot())
+
+Same Game._update the window runs, one FIXED_DT step at a time, with keys
+from a script instead of the keyboard — for soak tests, balance runs and
+benchmarks (python bench.py sim) on machines without a display.
+"""
+import os
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+from config import FIXED_DT
+from game import Game
+
+# Sim.act name → Game method (the actions the keyboard/mouse handlers call)
+ACTIONS = {
+    "attack": "do_attack",
+    "chop":   "_chop_mine",
+    "place":  "place_item",
+    "farm":   "do_farm_action",
+    "save":   "save_game",
+}
+
+
+class ScriptedKeys:
+    """Held keys, readable like pygame.key.get_pressed(); calling it returns itself"""
+
+    def __init__(self):
+        self.held = set()
+
+    def __getitem__(self, k): return k in self.held
+    def __call__(self): return self
+
+
+class Sim:
+    """Headless Game on a fixed step.
+
+    script — optional fn(sim) called before every step, to hold/release keys
+    and fire actions by tick (sim.ticks)."""
+
+    def __init__(self, seed=1, name="sim", diff=1, stage=1, script=None):
+        self.keys = ScriptedKeys()
+        self.game = Game(headless=True, keys=self.keys)
+        self.game.diff_idx = diff
+        self.game.cur_stage_id = stage
+        self.script = script
+        self.ticks = 0
+        self.game.new_game(name, seed=seed)
+        self.game._update(0.0)     # the sync loader is done already — enter the stage
+
+    @property
+    def player(self): return self.game.player
+
+    @property
+    def state(self): return self.game.state
+
+    def hold(self, *keys):
+        self.keys.held.update(keys); return self
+
+    def release(self, *keys):
+        """Let go of keys (all of them when none are given)"""
+        if keys: self.keys.held.difference_update(keys)
+        else:    self.keys.held.clear()
+        return self
+
+    def act(self, name):
+        getattr(self.game, ACTIONS[name])(); return self
+
+    def step(self, n=1):
+        """Run n simulation steps (stops early if the run leaves the game state)"""
+        g = self.game
+        for _ in range(n):
+            if g.state != "game": break
+            if self.script: self.script(self)
+            g._update(FIXED_DT)
+            self.ticks += 1
+        return self
+
+    def snapshot(self):
+        """Plain-data summary of the run, for comparing runs"""
+        g, p = self.game, self.game.player
+        return {
+            "state": g.state, "tick": g.tick, "time": round(g.timers.now, 6),
+            "player": {k: (round(v, 4) if isinstance(v, float) else v) for k, v in
+                       (("x", p.x), ("y", p.y), ("hp", p.hp), ("hunger", p.hunger),
+                        ("thirst", p.thirst), ("stamina", p.stamina), ("xp", p.xp),
+                        ("level", p.level), ("kills", p.kills))},
+            "inv": dict(p.inv),
+            "enemies": sorted((e.etype, round(e.x, 3), round(e.y, 3), round(e.hp, 3)) for e in g.enemies),
+            "mstats": dict(g.mstats),
+        }
@@ -0,0 +1,86 @@
+"""
+spatial.py — ตารางกริดแบ่งพื้นที่ (spatial hash) สำหรับหาของที่อยู่ใกล้ ๆ
+
+Objects live in square cells of `cell` pixels keyed by one packed int, so a
+query only touches the cells its circle/rect overlaps. The hash stores no
+positions: insert/move return the cell key the owner keeps, and queries
+return the candidates in the touched cells for the owner to filter exactly.
+"""
+from config import SPATIAL_CELL
+
+
+def pack(cx, cy):
+    """Cell coords → one int key (16 bits per axis, wraps far beyond any map)"""
+    return ((cx & 0xFFFF) << 16) | (cy & 0xFFFF)
+
+
+class SpatialHash:
+    """cell key → set of objects; O(1) insert / move / remove"""
+
+    def __init__(self, cell=SPATIAL_CELL):
+        self.cell = cell
+        self.cells = {}
+
+    def key(self, x, y):
+        return pack(int(x // self.cell), int(y // self.cell))
+
+    def __len__(self): return sum(len(s) for s in self.cells.values())
+
+    def insert(self, obj, x, y):
+        k = self.key(x, y)
+        s = self.cells.get(k)
+        if s is None: s = self.cells[k] = set()
+        s.add(obj)
+        return k
+
+    def remove(self, obj, k):
+        s = self.cells.get(k)
+        if s is None: return
+        s.discard(obj)
+        if not s: del self.cells[k]
+
+    def move(self, obj, k, x, y):
+        """Re-file obj (stored under k) at (x,y) → its new key"""
+        nk = self.key(x, y)
+        if nk != k:
+            self.remove(obj, k)
+            s = self.cells.get(nk)
+            if s is None: s = self.cells[nk] = set()
+            s.add(obj)
+        return nk
+
+    def clear(self): self.cells.clear()
+
+    def query_rect(self, x0, y0, x1, y1):
+        """Objects in every cell overlapping the rect (candidates — filter exactly)"""
+        c = self.cell; cells = self.cells; out = []
+        cx0, cx1 = int(x0 // c), int(x1 // c)
+        cy0, cy1 = int(y0 // c), int(y1 // c)
+        # few occupied cells and a huge rect: walk the occupied cells instead
+        if (cx1-cx0+1)*(cy1-cy0+1) > len(cells):
+            for k, s in cells.items():
+                kx, ky = k >> 16, k & 0xFFFF
+                if ((kx-cx0) & 0xFFFF) <= cx1-cx0 and ((ky-cy0) & 0xFFFF) <= cy1-cy0: out.extend(s)
+            return out
+        for cx in range(cx0, cx1+1):
+            for cy in range(cy0, cy1+1):
+                s = cells.get(pack(cx, cy))
+                if s: out.extend(s)
+        return out
+
+    def query_radius(self, x, y, r):
+        """Candidates within the circle's bounding cells (filter exactly)"""
+        return self.query_rect(x-r, y-r, x+r, y+r)
+
+    def outside(self, x, y, r):
+        """Candidates that may lie r or further from (x,y): all objects except
+        those in cells wholly inside the circle"""
+        c = self.cell; out = []
+        for k, s in self.cells.items():
+            kx, ky = k >> 16, k & 0xFFFF
+            if kx >= 0x8000: kx -= 0x10000
+            if ky >= 0x8000: ky -= 0x10000
+            # farthest corner of the cell from (x,y)
+            dx = max(abs(kx*c - x), abs((kx+1)*c - x)); dy = max(abs(ky*c - y), abs((ky+1)*c - y))
+            if dx*dx + dy*dy >= r*r: out.extend(s)
+        return out
@@ -0,0 +1,89 @@
+"""
+structures.py — ทะเบียนสิ่งก่อสร้างของผู้เล่น (กองไฟ ที่พัก กับดัก คบเพลิง บ้าน)
+
+The player's plain lists (p.campfires, p.shelters, …) stay the saved source of
+truth; Structures files each entry in a SpatialHash per kind, picking up
+appended entries and replaced lists lazily, and answers "what is around the
+player" once per position for Player.update, the HUD and the night overlay.
+Removals must go through Structures.remove, which bumps the kind's version:
+a remove plus an append leaves the length unchanged.
+"""
+import math
+from config import TILE
+from spatial import SpatialHash
+
+# kind → Player attribute holding its [(x, y)] list
+KINDS = {
+    "campfire": "campfires",
+    "shelter":  "shelters",
+    "trap":     "traps",
+    "torch":    "torches",
+    "house":    "houses",
+}
+
+
+class PlayerEnv:
+    """What the player stands near — radii as the game has always used them"""
+    __slots__ = ("near_fire", "fire_light", "near_torch", "near_shelter", "near_house", "lit")
+
+    def __init__(self, st, x, y):
+        self.near_fire    = st.near("campfire", x, y, TILE*4.5)   # warmth: regen + stamina
+        self.fire_light   = st.near("campfire", x, y, TILE*5)     # light reaches a bit further
+        self.near_torch   = st.near("torch",    x, y, TILE*3)
+        self.near_shelter = st.near("shelter",  x, y, TILE*3)
+        self.near_house   = st.near("house",    x, y, TILE*4)
+        self.lit = self.fire_light or self.near_torch
+
+
+class Structures:
+    """Spatial index over one player's structure lists"""
+
+    def __init__(self, player):
+        self.p = player
+        self.grids = {k: SpatialHash() for k in KINDS}
+        self._src  = dict.fromkeys(KINDS)    # kind → list object indexed
+        self._n    = dict.fromkeys(KINDS, 0) # entries of it indexed so far
+        self._ver  = dict.fromkeys(KINDS, 0) # bumped by remove()
+        self._seen = dict.fromkeys(KINDS, 0) # version the grid was built at
+        self._env  = None; self._env_key = None
+
+    def _sync(self, kind):
+        """Index entries added since last time; rebuild if the list was replaced
+        or something was removed from it"""
+        lst = getattr(self.p, KINDS[kind])
+        n = self._n[kind]
+        fresh = self._seen[kind] == self._ver[kind]
+        if lst is self._src[kind] and len(lst) == n and fresh: return lst
+        g = self.grids[kind]
+        if lst is not self._src[kind] or len(lst) < n or not fresh:
+            g.clear(); n = 0; self._src[kind] = lst; self._seen[kind] = self._ver[kind]
+        for i in range(n, len(lst)): g.insert(i, lst[i][0], lst[i][1])
+        self._n[kind] = len(lst); self._env = None
+        return lst
+
+    def add(self, kind, x, y):
+        lst = self._sync(kind)
+        lst.append((x, y)); self._sync(kind)
+
+    def remove(self, kind, pos):
+        getattr(self.p, KINDS[kind]).remove(pos); self._ver[kind] += 1
+
+    def count(self, kind): return len(self._sync(kind))
+
+    def near(self, kind, x, y, r):
+        """Any structure of kind strictly closer than r to (x,y)"""
+        lst = self._sync(kind)
+        return any(math.hypot(x-lst[i][0], y-lst[i][1]) < r for i in self.grids[kind].query_radius(x, y, r))
+
+    def in_rect(self, kind, x0, y0, x1, y1):
+        """Positions of kind strictly inside the rect, in placement order"""
+        lst = self._sync(kind)
+        pts = (lst[i] for i in sorted(self.grids[kind].query_rect(x0, y0, x1, y1)))
+        return [(x, y) for x, y in pts if x0 < x < x1 and y0 < y < y1]
+
+    def env(self, x, y):
+        """PlayerEnv at (x,y) — recomputed only when the position or a list changes"""
+        for k in KINDS: self._sync(k)
+        if self._env is None or self._env_key != (x, y):
+            self._env = PlayerEnv(self, x, y); self._env_key = (x, y)
+        return self._env
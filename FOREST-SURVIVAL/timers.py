@@ -0,0 +1,109 @@
+"""
+timers.py — hierarchical timer wheel สำหรับเวลาในเกม (นับเฉพาะตอนเล่นอยู่)
+
+Time advances in ticks of TICK seconds. A timer sits in one slot of one of
+LEVELS wheels of SLOTS slots each, chosen by how far away it is; a slot of a
+coarser wheel is re-filed into finer ones when the tick counter reaches it.
+advance() therefore only touches the slots it passes and the timers that
+actually come due, however many are pending. Cancelling just marks the
+timer; it is dropped when its slot comes round.
+
+Countdowns that are only ever read ("is the cooldown over?") need no timer
+at all: store now + seconds and compare against TimerWheel.now.
+"""
+import math
+from config import FIXED_DT
+
+TICK   = FIXED_DT  # one simulation step
+SLOTS  = 64        # per wheel — at 60 ticks/s: 64 ≈ 1 s, 64² ≈ 68 s, 64³ ≈ 73 min, 64⁴ ≈ 78 h
+LEVELS = 4
+_BITS  = 6         # log2(SLOTS)
+
+
+class Timer:
+    """Handle returned by TimerWheel.after/every"""
+    __slots__ = ("due", "fn", "args", "period", "live")
+
+    def __init__(self, due, fn, args, period):
+        self.due, self.fn, self.args, self.period, self.live = due, fn, args, period, True
+
+    def cancel(self): self.live = False
+
+
+class TimerWheel:
+    """Game-time scheduler. scale stretches game time; paused stops it."""
+
+    def __init__(self, tick=TICK):
+        self.tick = tick
+        self.now = 0.0        # game seconds advanced so far
+        self.scale = 1.0
+        self.paused = False
+        self._t = 0           # next tick to process
+        self.wheels = [[[] for _ in range(SLOTS)] for _ in range(LEVELS)]
+
+    def __len__(self):
+        return sum(tm.live for w in self.wheels for s in w for tm in s)
+
+    # ── Scheduling ──
+    def _due(self, delay):
+        return max(self._t, math.ceil((self.now + delay) / self.tick - 1e-9))
+
+    def _file(self, tm):
+        d = tm.due - self._t
+        for lvl in range(LEVELS):
+            if d < SLOTS << (_BITS*lvl):
+                self.wheels[lvl][(tm.due >> (_BITS*lvl)) & (SLOTS-1)].append(tm); return
+        # beyond the last wheel: park in its farthest slot, re-filed when reached
+        lvl = LEVELS-1
+        self.wheels[lvl][((self._t >> (_BITS*lvl)) - 1) & (SLOTS-1)].append(tm)
+
+    def after(self, delay, fn, *args):
+        """fn(*args) once, delay game seconds from now"""
+        tm = Timer(self._due(delay), fn, args, None); self._file(tm)
+        return tm
+
+    def every(self, period, fn, *args, first=None):
+        """fn(*args) every period seconds (first call after `first`, default period)"""
+        tm = Timer(self._due(period if first is None else first), fn, args, period); self._file(tm)
+        return tm
+
+    def clear(self):
+        for w in self.wheels:
+            for s in w:
+                for tm in s: tm.live = False
+                s.clear()
+
+    # ── Running ──
+    def _cascade(self, lvl):
+        idx = (self._t >> (_BITS*lvl)) & (SLOTS-1)
+        slot = self.wheels[lvl][idx]; self.wheels[lvl][idx] = []
+        for tm in slot:
+            if tm.live: self._file(tm)
+        return idx
+
+    def advance(self, dt):
+        """Move game time on by dt*scale, firing what comes due → the scaled dt"""
+        if self.paused: return 0.0
+        dt *= self.scale
+        self.now += dt
+        target = int(self.now / self.tick)
+        w0 = self.wheels[0]
+        while self._t <= target:
+            t = self._t
+            if t & (SLOTS-1) == 0 and t:
+                lvl = 1
+                while lvl < LEVELS and self._cascade(lvl) == 0: lvl += 1
+            idx = t & (SLOTS-1)
+            slot = w0[idx]
+            self._t = t + 1
+            if not slot: continue
+            w0[idx] = []
+            for tm in slot:
+                if not tm.live: continue
+                if tm.due > t: self._file(tm); continue
+                if tm.period is not None:
+                    tm.due = max(self._t, tm.due + max(1, round(tm.period / self.tick))); self._file(tm)
+                else:
+                    tm.live = False
+                tm.fn(*tm.args)
+        return dt
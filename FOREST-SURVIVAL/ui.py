@@ -4,7 +4,7 @@ ui.py — HUD, Screens, Overlays ทั้งหมด
 import math
 import os
 import pygame
-from config import PAL, TILE, SW, SH, SAVE, WEAPON_DATA, ITEM_COLS, ITEM_NAMES, RECIPES, DIFFS, STAGES, SKIN_COLS, HAIR_COLS, SHIRT_COLS, PANTS_COLS, HATS, START_WEPS
+from config import PAL, SW, SH, SAVE, WEAPON_DATA, ITEM_COLS, ITEM_NAMES, RECIPES, DIFFS, STAGES, SKIN_COLS, HAIR_COLS, SHIRT_COLS, PANTS_COLS, HATS, START_WEPS
 
 def draw_mission_panel(surf, fonts, stage, mstats):
     F, Fm, Fs = fonts
@@ -154,6 +154,30 @@ def draw_game_clear(surf, fonts, mouse, player):
     return bm
 
 
+# ─────────────────────────────────────────────────────
+#  LOADING (stage world being built in the background)
+# ─────────────────────────────────────────────────────
+def draw_loading(surf, fonts, stage, frame):
+    F, Fm, Fs = fonts
+    surf.fill((4, 10, 4))
+    t = Fm.render(stage["name"], True, stage["col"])
+    surf.blit(t, (SW // 2 - t.get_width() // 2, SH // 2 - 110))
+    sub = Fs.render(stage["subtitle"], True, PAL["ui_dim"])
+    surf.blit(sub, (SW // 2 - sub.get_width() // 2, SH // 2 - 52))
+    for i, msg in enumerate(stage["intro"][1:]):
+        mt = F.render(msg, True, PAL["ui_text"])
+        surf.blit(mt, (SW // 2 - mt.get_width() // 2, SH // 2 - 10 + i * 30))
+    # Spinner — 8 dots, the lit one walks round
+    for i in range(8):
+        a = i * math.pi / 4
+        lit = (frame // 5 - i) % 8
+        c = max(40, 230 - lit * 28)
+        pygame.draw.circle(surf, (c, c, c // 2),
+                           (SW // 2 + int(math.cos(a) * 22), SH // 2 + 90 + int(math.sin(a) * 22)), 5)
+    lt = Fs.render("กำลังสร้างโลก…", True, PAL["ui_dim"])
+    surf.blit(lt, (SW // 2 - lt.get_width() // 2, SH // 2 + 125))
+
+
 # ─────────────────────────────────────────────────────
 #  UI HELPERS
 # ─────────────────────────────────────────────────────
@@ -376,9 +400,7 @@ def draw_hud(surf, p, fonts, ps):
     else:          tod = "🌙 กลางคืน";  todcol = (140, 140, 220); phase = 3
 
     # Check fire nearby
-    near_fire = any(math.hypot(p.x-fx,p.y-fy)<TILE*5 for fx,fy in p.campfires)
-    near_torch = any(math.hypot(p.x-tx,p.y-ty)<TILE*3 for tx,ty in p.torches)
-    has_light = near_fire or near_torch
+    has_light = p.structures.env(p.x, p.y).lit
 
     # Panel background
     pan_w, pan_h = 220, 80
@@ -669,9 +691,7 @@ def day_night(surf, p, night_surf=None):
     elif t < 6:  alpha = int((t-5)*110)
     elif t < 9:  alpha = min(190, 110+int((t-6)*30))
     else:        alpha = int((10-t)*65)
-    nf = any(math.hypot(p.x-fx,p.y-fy)<TILE*5 for fx,fy in p.campfires)
-    nt = any(math.hypot(p.x-tx,p.y-ty)<TILE*3 for tx,ty in p.torches)
-    if nf or nt: alpha = max(0, alpha-90)
+    if p.structures.env(p.x, p.y).lit: alpha = max(0, alpha-90)
     if alpha > 0:
         if night_surf is None:
             night_surf = pygame.Surface((SW,SH), pygame.SRCALPHA)
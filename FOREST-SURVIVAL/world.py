@@ -1,9 +1,20 @@
 """
 world.py — World generation และ tile rendering
 """
+import math
 import random
+import weakref
+from array import array
+from collections import deque
 import pygame
-from config import PAL, TILE, TGRASS, TWATER, TDEEP, TMUD, TROCK, TSAND
+from config import (PAL, TILE, SW, SH, TGRASS, TWATER, TDEEP, TMUD, TROCK, TSAND,
+                    WORLD_W, WORLD_H, CHUNK, CHUNK_BUDGET)
+from worldcache import default_cache
+
+try:
+    import numpy as np
+except ImportError:     # numpy เป็น optional — ไม่มีก็ใช้ scalar path
+    np = None
 
 # ─────────────────────────────────────────────────────
 #  NOISE HELPERS
@@ -23,6 +34,72 @@ def _smooth(x, y, seed, sc):
     return v * (1 - ty) + w * ty
 
 
+# ─────────────────────────────────────────────────────
+#  BATCHED NOISE — same maths as _hash/_smooth on whole arrays
+# ─────────────────────────────────────────────────────
+def _hash_grid(ix, iy, seed):
+    """_hash over int64 arrays. Overflow wraps mod 2**64, and only the low
+    31 bits survive the mask, so the result matches the bigint version."""
+    n = ix * 1619 + iy * 31337 + int(seed) * 1013
+    n = (n >> 13) ^ n
+    return 1.0 - ((n * (n * n * 15731 + 789221) + 1376312589) & 0x7fffffff) / 1073741824.0
+
+def _smooth_grid(xs, ys, seed, sc):
+    """_smooth for every (x in xs) × (y in ys) → array shape (len(ys), len(xs))"""
+    fx, fy = xs / sc, ys / sc
+    ix, iy = fx.astype(np.int64), fy.astype(np.int64)    # truncate like int()
+    tx = (fx - ix); tx = tx * tx * (3 - 2 * tx)
+    ty = (fy - iy); ty = ty * ty * (3 - 2 * ty)
+    ix, iy = ix[None, :], iy[:, None]
+    tx, ty = tx[None, :], ty[:, None]
+    v = _hash_grid(ix, iy, seed) * (1 - tx) + _hash_grid(ix + 1, iy, seed) * tx
+    w = _hash_grid(ix, iy + 1, seed) * (1 - tx) + _hash_grid(ix + 1, iy + 1, seed) * tx
+    return v * (1 - ty) + w * ty
+
+def _gen_tiles_scalar(x0, y0, w, h, seed):
+    """Reference terrain path — one _smooth call chain per tile."""
+    s = seed
+    rows = [[TGRASS] * w for _ in range(h)]
+    for ty in range(y0, y0 + h):
+        row = rows[ty - y0]
+        for tx in range(x0, x0 + w):
+            hv = _smooth(tx, ty, s, 14)*0.5 + _smooth(tx, ty, s+1, 6)*0.3 + _smooth(tx, ty, s+2, 3)*0.2
+            wv = _smooth(tx, ty, s+7, 12)
+            if wv > 0.62:
+                row[tx - x0] = TDEEP if wv > 0.75 else TWATER
+            elif hv < -0.35:
+                row[tx - x0] = TMUD
+            elif hv > 0.52:
+                row[tx - x0] = TROCK
+            elif abs(_smooth(tx, ty, s+4, 7)) > 0.58:
+                row[tx - x0] = TSAND
+    return rows
+
+def _gen_tiles_np(x0, y0, w, h, seed):
+    """Height / water / sand fields for the whole rect in one pass → uint8 (h,w)"""
+    s = seed
+    xs = np.arange(x0, x0 + w, dtype=np.int64)
+    ys = np.arange(y0, y0 + h, dtype=np.int64)
+    hv = _smooth_grid(xs, ys, s, 14)*0.5 + _smooth_grid(xs, ys, s+1, 6)*0.3 + _smooth_grid(xs, ys, s+2, 3)*0.2
+    wv = _smooth_grid(xs, ys, s+7, 12)
+    sand = np.abs(_smooth_grid(xs, ys, s+4, 7)) > 0.58
+    out = np.full((h, w), TGRASS, dtype=np.uint8)
+    # apply lowest priority first so later masks win, same as the if/elif chain
+    out[sand]       = TSAND
+    out[hv > 0.52]  = TROCK
+    out[hv < -0.35] = TMUD
+    out[wv > 0.62]  = TWATER
+    out[wv > 0.75]  = TDEEP
+    return out
+
+def gen_tiles(x0, y0, w, h, seed):
+    """Terrain ids for tiles [x0,x0+w) × [y0,y0+h) as a row-major bytearray.
+    Uses numpy when available, otherwise the scalar path — identical output."""
+    if np is not None:
+        return bytearray(_gen_tiles_np(x0, y0, w, h, seed).tobytes())
+    return bytearray(t for row in _gen_tiles_scalar(x0, y0, w, h, seed) for t in row)
+
+
 # ─────────────────────────────────────────────────────
 #  TILE CACHE
 # ─────────────────────────────────────────────────────
@@ -78,62 +155,411 @@ def get_tile_surf(tid, tx, ty):
     return _tile_cache[key]
 
 
+# ─────────────────────────────────────────────────────
+#  TERRAIN LAYER — baked blocks + scrolling background
+# ─────────────────────────────────────────────────────
+BAKE = 8      # tiles per baked block side (320px)
+
+class TerrainLayer:
+    """Terrain for one World, drawn with a single blit per frame.
+    Tiles are baked once into BAKE×BAKE-tile block surfaces; a persistent
+    screen-sized background is scrolled with the camera and only the newly
+    exposed strips are repainted from those blocks."""
+
+    def __init__(self, world, size=(SW, SH), max_blocks=32):
+        self.world = world
+        self.bg = pygame.Surface(size)
+        self.blocks = {}          # (bx,by) → Surface, dict order = LRU order
+        self.max_blocks = max_blocks
+        self.origin = None        # camera (cx,cy) the background currently shows
+
+    def invalidate(self):
+        self.blocks.clear(); self.origin = None
+
+    def _block(self, bx, by):
+        s = self.blocks.pop((bx, by), None)
+        if s is None:
+            s = pygame.Surface((BAKE*TILE, BAKE*TILE))
+            s.fill(PAL["ui_bg"])
+            x0, y0 = bx*BAKE, by*BAKE
+            ids = self.world.region(x0, y0, x0+BAKE, y0+BAKE)
+            s.blits([(get_tile_surf(t, x0 + i % BAKE, y0 + i // BAKE), (i % BAKE * TILE, i // BAKE * TILE))
+                     for i, t in enumerate(ids) if t != 255], False)
+            if len(self.blocks) >= self.max_blocks:
+                del self.blocks[next(iter(self.blocks))]
+        self.blocks[(bx, by)] = s
+        return s
+
+    def _paint(self, x, y, w, h, cx, cy):
+        """Repaint background rect (screen coords) for camera (cx,cy)"""
+        if w <= 0 or h <= 0: return
+        B = BAKE*TILE
+        self.bg.set_clip((x, y, w, h))
+        for by in range((cy+y)//B, (cy+y+h-1)//B + 1):
+            for bx in range((cx+x)//B, (cx+x+w-1)//B + 1):
+                self.bg.blit(self._block(bx, by), (bx*B-cx, by*B-cy))
+        self.bg.set_clip(None)
+
+    def draw(self, surf, cx, cy):
+        W, H = self.bg.get_size()
+        if self.origin is None:
+            self._paint(0, 0, W, H, cx, cy)
+        else:
+            dx, dy = cx - self.origin[0], cy - self.origin[1]
+            if abs(dx) >= W or abs(dy) >= H:
+                self._paint(0, 0, W, H, cx, cy)
+            elif dx or dy:
+                self.bg.scroll(-dx, -dy)
+                if dx > 0:   self._paint(W-dx, 0, dx, H, cx, cy)
+                elif dx < 0: self._paint(0, 0, -dx, H, cx, cy)
+                if dy > 0:   self._paint(0, H-dy, W, dy, cx, cy)
+                elif dy < 0: self._paint(0, 0, W, -dy, cx, cy)
+        self.origin = (cx, cy)
+        surf.blit(self.bg, (0, 0))
+
+
 # ─────────────────────────────────────────────────────
 #  WORLD CLASS
 # ─────────────────────────────────────────────────────
-class World:
-    W, H = 96, 72
+CSHIFT = CHUNK.bit_length() - 1
+CMASK  = CHUNK - 1
+OSHIFT = 3                # object index buckets are 8×8 tiles
+
+BLOCKING = ("tree", "ore")     # object types that stop movement
+
+class Chunk:
+    """CHUNK×CHUNK tiles generated together, plus the object keys it placed"""
+    __slots__ = ("cx", "cy", "tiles", "walk", "keys")
+
+    def __init__(self, cx, cy, tiles):
+        self.cx, self.cy = cx, cy
+        self.tiles = tiles    # bytearray, 1 byte per tile, index (ly<<CSHIFT)|lx
+        self.walk  = None     # bytearray, same layout — 1 = passable
+        self.keys  = []       # (tx,ty) of objs created by generation
+
+
+class WalkIndex:
+    """Nearest-walkable-tile table for a tile rect, built once by multi-source BFS.
+
+    near[i] is the flat index of the walkable tile closest (in steps) to tile i,
+    -1 if the rect has none — so nearest() is a single array read."""
+    WINDOW = 128    # rect side — bounded maps are clipped to it too, so only nearby chunks load
+
+    def __init__(self, world, x0, y0, w, h):
+        self.x0, self.y0, self.w, self.h = x0, y0, w, h
+        # sides on the map edge need no margin: nothing lies beyond them
+        m = w // 4
+        self.lo = (x0 if world.bounded and x0 <= 0 else x0 + m,
+                   y0 if world.bounded and y0 <= 0 else y0 + m)
+        self.hi = (x0 + w if world.bounded and x0 + w >= world.W else x0 + w - m,
+                   y0 + h if world.bounded and y0 + h >= world.H else y0 + h - m)
+        n = w * h
+        near = array("i", [-1]) * n
+        q = deque()
+        for row, ty in enumerate(range(y0, y0 + h)):
+            o = row * w
+            for k, ok in enumerate(world.walkable_many([(tx, ty) for tx in range(x0, x0 + w)])):
+                if ok: near[o + k] = o + k; q.append(o + k)
+        while q:
+            i = q.popleft(); src = near[i]
+            x = i % w
+            for j in ((i - 1) if x > 0 else -1, (i + 1) if x < w - 1 else -1, i - w, i + w):
+                if 0 <= j < n and near[j] < 0:
+                    near[j] = src; q.append(j)
+        self.near = near
+
+    def covers(self, tx, ty):
+        """True if (tx,ty) is well inside the rect (a quarter-side margin, none on map edges)"""
+        return self.lo[0] <= tx < self.hi[0] and self.lo[1] <= ty < self.hi[1]
 
-    def __init__(self, seed=None):
+    def nearest(self, tx, ty):
+        """Closest walkable tile to (tx,ty), clamped into the rect; None if there is none"""
+        x = min(max(tx - self.x0, 0), self.w - 1)
+        y = min(max(ty - self.y0, 0), self.h - 1)
+        j = self.near[y * self.w + x]
+        if j < 0: return None
+        return self.x0 + j % self.w, self.y0 + j // self.w
+
+
+GEN_VERSION = 1   # bump whenever generator output changes — invalidates disk cache
+
+class World:
+    def __init__(self, seed=None, w=WORLD_W, h=WORLD_H, cache=True):
         self.seed = seed or random.randint(1, 99999)
-        random.seed(self.seed)
-        self.tiles = [[TGRASS] * self.W for _ in range(self.H)]
-        self.objs  = {}   # (tx,ty) → {"type","hp","stage"}
+        self.W, self.H = w, h     # None → unbounded
+        # On-disk chunk cache shared by every World with this seed/size
+        self.cache = None
+        if cache:
+            wc = default_cache()
+            self.cache = wc.open(self.seed, w, h, GEN_VERSION)
+            if self.cache: weakref.finalize(self, wc.release, self.cache)
+        self.chunks = {}  # (cx,cy) → Chunk, generated on first touch
+        self.delta  = {}  # (cx,cy) → {(tx,ty): None=removed | hp=damaged | obj dict=placed}
+        self.objs  = {}   # (tx,ty) → {"type","hp","stage"}  (loaded chunks only)
+        self.obj_cells = {}  # (tx>>OSHIFT, ty>>OSHIFT) → {(tx,ty): obj} — keep in sync via _put/_del_obj
         self.drops = {}   # (tx,ty) → [{"id","qty"}]
-        self._generate()
-
-    def _generate(self):
-        s = self.seed
-        for ty in range(self.H):
-            for tx in range(self.W):
-                h = _smooth(tx, ty, s, 14)*0.5 + _smooth(tx, ty, s+1, 6)*0.3 + _smooth(tx, ty, s+2, 3)*0.2
-                w = _smooth(tx, ty, s+7, 12)
-                if w > 0.62:
-                    self.tiles[ty][tx] = TDEEP if w > 0.75 else TWATER
-                elif h < -0.35:
-                    self.tiles[ty][tx] = TMUD
-                elif h > 0.52:
-                    self.tiles[ty][tx] = TROCK
-                elif abs(_smooth(tx, ty, s+4, 7)) > 0.58:
-                    self.tiles[ty][tx] = TSAND
-
-        for ty in range(1, self.H-1):
-            for tx in range(1, self.W-1):
-                t = self.tiles[ty][tx]
-                r = random.random()
-                if t == TGRASS:
-                    if   r < 0.065: self.objs[(tx, ty)] = {"type":"tree",     "hp":5, "stage":random.randint(2, 4)}
-                    elif r < 0.095: self.objs[(tx, ty)] = {"type":"bush",     "hp":2, "stage":1}
-                    elif r < 0.110: self.objs[(tx, ty)] = {"type":"mushroom", "hp":1, "stage":1}
-                    elif r < 0.115: self.objs[(tx, ty)] = {"type":"flower",   "hp":1, "stage":1}
-                elif t == TROCK and r < 0.22:
-                    self.objs[(tx, ty)] = {"type":"ore", "hp":6, "stage":random.randint(1, 3)}
-                elif t == TMUD and r < 0.06:
-                    self.objs[(tx, ty)] = {"type":"reed", "hp":1, "stage":1}
-                elif t == TSAND and r < 0.03:
-                    self.objs[(tx, ty)] = {"type":"cactus", "hp":2, "stage":1}
+        self._focus = (0, 0)
+        self._walk_idx = None   # WalkIndex, built on first spawn query
+        self.walk_ver  = 0      # bumped on every passability change after generation
+        self.walk_listeners = []  # fn(tx, ty) called after each such change
+        self.chunk_listeners = [] # fn(cx, cy, loaded) called after a chunk loads / unloads
+
+    # ── Bounds ──
+    @property
+    def bounded(self):
+        return self.W is not None
+
+    def in_bounds(self, tx, ty):
+        return self.W is None or (0 <= tx < self.W and 0 <= ty < self.H)
+
+    def centre(self):
+        return (self.W//2, self.H//2) if self.bounded else (0, 0)
+
+    def walk_index(self, tx=0, ty=0):
+        """WalkIndex over a WINDOW-tile square around (tx,ty), clipped to the map"""
+        idx = self._walk_idx
+        if idx is None or not idx.covers(tx, ty):
+            n = WalkIndex.WINDOW
+            if self.bounded:
+                tx = min(max(tx, 0), self.W - 1); ty = min(max(ty, 0), self.H - 1)
+            x0, y0, x1, y1 = self.clamp_rect(tx - n//2, ty - n//2, tx + n//2, ty + n//2)
+            idx = self._walk_idx = WalkIndex(self, x0, y0, x1 - x0, y1 - y0)
+        return idx
+
+    def _indexed(self, tx, ty, x, y):
+        """idx.nearest(x,y), rebuilding the window once if walls/objects changed since the build"""
+        p = self.walk_index(tx, ty).nearest(x, y)
+        if p is not None and not self.walkable(*p):
+            self._walk_idx = None
+            p = self.walk_index(tx, ty).nearest(x, y)
+        return p
+
+    def nearest_walkable(self, tx, ty):
+        """Closest walkable tile to (tx,ty); (tx,ty) itself if the map has none"""
+        return self._indexed(tx, ty, tx, ty) or (tx, ty)
+
+    def random_walkable(self, tx, ty, rmin, rmax, rng=random, tries=6):
+        """Random walkable tile rmin..rmax tiles from (tx,ty), or None.
+        A random point in the ring snapped to its nearest walkable tile — kept
+        if the snap did not leave the ring."""
+        for _ in range(tries):
+            a = rng.uniform(0, math.pi*2); d = rng.uniform(rmin, rmax)
+            p = self._indexed(tx, ty, int(tx + math.cos(a)*d), int(ty + math.sin(a)*d))
+            if p is None: return None
+            if rmin*rmin <= (p[0]-tx)**2 + (p[1]-ty)**2 <= rmax*rmax:
+                return p
+        return None
+
+    def clamp_rect(self, x0, y0, x1, y1):
+        """Clip a tile rect [x0,x1)×[y0,y1) to the map"""
+        if self.bounded:
+            x0 = max(0, x0); y0 = max(0, y0)
+            x1 = min(self.W, x1); y1 = min(self.H, y1)
+        return x0, y0, x1, y1
+
+    # ── Chunks ──
+    def _chunk(self, tx, ty):
+        key = (tx >> CSHIFT, ty >> CSHIFT)
+        c = self.chunks.get(key)
+        if c is None:
+            c = self._generate(*key)
+        return c
+
+    def _gen_chunk(self, cx, cy):
+        """Pristine generator output → (tiles, [(lx,ly,type,hp,stage)])"""
+        x0, y0 = cx*CHUNK, cy*CHUNK
+        tiles = gen_tiles(x0, y0, CHUNK, CHUNK, self.seed)
+        # Per-chunk RNG so a chunk looks the same whenever (and in whatever order) it loads
+        rng = random.Random(f"{self.seed}:{cx}:{cy}")
+        objs = []
+        for i, t in enumerate(tiles):
+            lx, ly = i & CMASK, i >> CSHIFT
+            r = rng.random()
+            if self.bounded and not (1 <= x0+lx < self.W-1 and 1 <= y0+ly < self.H-1): continue
+            if t == TGRASS:
+                if   r < 0.065: objs.append((lx, ly, "tree",     5, rng.randint(2, 4)))
+                elif r < 0.095: objs.append((lx, ly, "bush",     2, 1))
+                elif r < 0.110: objs.append((lx, ly, "mushroom", 1, 1))
+                elif r < 0.115: objs.append((lx, ly, "flower",   1, 1))
+            elif t == TROCK and r < 0.22:
+                objs.append((lx, ly, "ore", 6, rng.randint(1, 3)))
+            elif t == TMUD and r < 0.06:
+                objs.append((lx, ly, "reed", 1, 1))
+            elif t == TSAND and r < 0.03:
+                objs.append((lx, ly, "cactus", 2, 1))
+        return tiles, objs
+
+    def _generate(self, cx, cy):
+        got = self.cache.load(cx, cy) if self.cache else None
+        if got is None:
+            got = self._gen_chunk(cx, cy)
+            if self.cache: self.cache.store(cx, cy, *got)
+        tiles, objs = got
+        c = Chunk(cx, cy, tiles)
+        x0, y0 = cx*CHUNK, cy*CHUNK
+        d = self.delta.get((cx, cy), {})
+        for lx, ly, t, hp, st in objs:
+            key = (x0+lx, y0+ly)
+            if key in d:
+                v = d[key]
+                if v is None or isinstance(v, dict): continue   # removed / replaced
+                hp = v
+            self._put_obj(key, {"type":t, "hp":hp, "stage":st})
+            c.keys.append(key)
+        for key, v in d.items():
+            if isinstance(v, dict):
+                self._put_obj(key, v); c.keys.append(key)
+        # Passability: terrain, then blocking objects
+        c.walk = bytearray(0 if t in (TWATER, TDEEP) else 1 for t in tiles)
+        for key in c.keys:
+            if self.objs[key]["type"] in BLOCKING:
+                c.walk[((key[1] & CMASK) << CSHIFT) | (key[0] & CMASK)] = 0
+        self.chunks[(cx, cy)] = c
+        for fn in self.chunk_listeners: fn(cx, cy, True)
+        return c
+
+    def ensure(self, x0, y0, x1, y1):
+        """Generate every chunk overlapping tile rect [x0,x1)×[y0,y1)"""
+        x0, y0, x1, y1 = self.clamp_rect(x0, y0, x1, y1)
+        for cy in range(y0 >> CSHIFT, ((y1-1) >> CSHIFT) + 1):
+            for cx in range(x0 >> CSHIFT, ((x1-1) >> CSHIFT) + 1):
+                if (cx, cy) not in self.chunks:
+                    self._generate(cx, cy)
+
+    def stream(self, x0, y0, x1, y1):
+        """Call once per frame with the tile rect around the camera:
+        loads what is (about to be) visible and unloads far chunks over budget."""
+        self.ensure(x0, y0, x1, y1)
+        self._focus = ((x0+x1)//2 >> CSHIFT, (y0+y1)//2 >> CSHIFT)
+        if len(self.chunks) > CHUNK_BUDGET:
+            self.trim()
+
+    def trim(self, budget=CHUNK_BUDGET):
+        fx, fy = self._focus
+        far = sorted(self.chunks, key=lambda k: max(abs(k[0]-fx), abs(k[1]-fy)), reverse=True)
+        for k in far[:max(0, len(self.chunks)-budget)]:
+            c = self.chunks.pop(k)
+            for key in c.keys:
+                self._del_obj(key)
+            for fn in self.chunk_listeners: fn(*k, False)
+
+    # ── Tile / object access ──
+    def tile(self, tx, ty):
+        """Tile id at (tx,ty) or None outside the map"""
+        if not self.in_bounds(tx, ty): return None
+        return self._chunk(tx, ty).tiles[((ty & CMASK) << CSHIFT) | (tx & CMASK)]
+
+    def chunk_view(self, cx, cy):
+        """Zero-copy memoryview of one chunk's tiles (CHUNK*CHUNK bytes, row-major).
+        numpy: np.frombuffer(view, np.uint8).reshape(CHUNK, CHUNK)"""
+        c = self.chunks.get((cx, cy)) or self._generate(cx, cy)
+        return memoryview(c.tiles)
+
+    def region(self, x0, y0, x1, y1):
+        """Tiles of rect [x0,x1)×[y0,y1) packed row-major into one bytearray.
+        Outside a bounded map reads as 255. For minimaps, saves, path grids."""
+        w = x1 - x0
+        out = bytearray(b"\xff" * (w * (y1 - y0)))
+        cx0, cy0, cx1, cy1 = self.clamp_rect(x0, y0, x1, y1)
+        if cx1 <= cx0 or cy1 <= cy0: return out
+        for cy in range(cy0 >> CSHIFT, ((cy1-1) >> CSHIFT) + 1):
+            for cx in range(cx0 >> CSHIFT, ((cx1-1) >> CSHIFT) + 1):
+                src = self.chunk_view(cx, cy)
+                ax0 = max(cx0, cx*CHUNK); ax1 = min(cx1, (cx+1)*CHUNK)
+                for ty in range(max(cy0, cy*CHUNK), min(cy1, (cy+1)*CHUNK)):
+                    so = ((ty & CMASK) << CSHIFT) + (ax0 & CMASK)
+                    do = (ty - y0) * w + (ax0 - x0)
+                    out[do:do + ax1 - ax0] = src[so:so + ax1 - ax0]
+        return out
+
+    def obj(self, tx, ty):
+        if not self.in_bounds(tx, ty): return None
+        self._chunk(tx, ty)
+        return self.objs.get((tx, ty))
+
+    # ── Object index ──
+    def _put_obj(self, key, obj):
+        self.objs[key] = obj
+        self.obj_cells.setdefault((key[0] >> OSHIFT, key[1] >> OSHIFT), {})[key] = obj
+        if obj["type"] in BLOCKING: self._repass(key)
+
+    def _del_obj(self, key):
+        obj = self.objs.pop(key, None)
+        if obj is None: return
+        ck = (key[0] >> OSHIFT, key[1] >> OSHIFT)
+        cell = self.obj_cells[ck]
+        del cell[key]
+        if not cell: del self.obj_cells[ck]
+        if obj["type"] in BLOCKING: self._repass(key)
+
+    # ── Passability grid ──
+    def _repass(self, key):
+        """Recompute one tile of the passability grid (if its chunk is loaded)"""
+        tx, ty = key
+        ck = (tx >> CSHIFT, ty >> CSHIFT)
+        c = self.chunks.get(ck)
+        if c is None or c.walk is None: return
+        i = ((ty & CMASK) << CSHIFT) | (tx & CMASK)
+        obj = self.objs.get(key)
+        c.walk[i] = not (c.tiles[i] in (TWATER, TDEEP)
+                         or (obj is not None and obj["type"] in BLOCKING))
+        self.walk_ver += 1
+        for fn in self.walk_listeners: fn(tx, ty)
+
+    def walkable_many(self, pts):
+        """[walkable(tx,ty) for (tx,ty) in pts] with one chunk lookup per run of points"""
+        out = []
+        chunks = self.chunks
+        last_k = last = None
+        for tx, ty in pts:
+            if self.W is not None and not (0 <= tx < self.W and 0 <= ty < self.H):
+                out.append(False); continue
+            k = (tx >> CSHIFT, ty >> CSHIFT)
+            if k != last_k:
+                last_k = k
+                last = chunks.get(k) or self._generate(*k)
+            out.append(last.walk[((ty & CMASK) << CSHIFT) | (tx & CMASK)] == 1)
+        return out
+
+    def walkable_np(self, tx, ty):
+        """Vectorised walkable for int arrays of tile coords (numpy only) → bool array"""
+        out = np.zeros(len(tx), bool)
+        if not len(tx): return out
+        ok = np.ones(len(tx), bool) if self.W is None else (tx >= 0) & (tx < self.W) & (ty >= 0) & (ty < self.H)
+        ckx, cky = tx >> CSHIFT, ty >> CSHIFT
+        idx = ((ty & CMASK) << CSHIFT) | (tx & CMASK)
+        for k in set(zip(ckx[ok].tolist(), cky[ok].tolist())):
+            c = self.chunks.get(k) or self._generate(*k)
+            m = ok & (ckx == k[0]) & (cky == k[1])
+            out[m] = np.frombuffer(c.walk, np.uint8)[idx[m]] == 1
+        return out
+
+    def objs_in_rect(self, x0, y0, x1, y1):
+        """[((tx,ty), obj)] for tiles inside [x0,x1)×[y0,y1), ordered by row
+        (back to front). Cost scales with the rect, not with the map."""
+        out = []
+        cells = self.obj_cells
+        for by in range(y0 >> OSHIFT, ((y1-1) >> OSHIFT) + 1):
+            for bx in range(x0 >> OSHIFT, ((x1-1) >> OSHIFT) + 1):
+                cell = cells.get((bx, by))
+                if not cell: continue
+                for k, o in cell.items():
+                    if x0 <= k[0] < x1 and y0 <= k[1] < y1:
+                        out.append((k, o))
+        out.sort(key=lambda kv: kv[0][1])
+        return out
 
     def walkable(self, tx, ty):
-        if not (0 <= tx < self.W and 0 <= ty < self.H): return False
-        if self.tiles[ty][tx] in (TWATER, TDEEP): return False
-        obj = self.objs.get((tx, ty))
-        if obj and obj["type"] in ("tree", "ore"): return False
-        return True
+        if self.W is not None and not (0 <= tx < self.W and 0 <= ty < self.H): return False
+        c = self.chunks.get((tx >> CSHIFT, ty >> CSHIFT)) or self._generate(tx >> CSHIFT, ty >> CSHIFT)
+        return c.walk[((ty & CMASK) << CSHIFT) | (tx & CMASK)] == 1
 
     def hit(self, tx, ty, power=1):
-        obj = self.objs.get((tx, ty))
+        obj = self.obj(tx, ty)
         if not obj: return []
         obj["hp"] -= power
+        if obj["hp"] > 0 and not self._placed((tx, ty)):
+            self._mark((tx, ty), obj["hp"])     # placed objs are tracked by reference
         drops = []
         if obj["hp"] <= 0:
             t = obj["type"]
@@ -150,7 +576,8 @@ class World:
             elif t == "reed":     drops = [{"id":"reed",     "qty":random.randint(1, 3)}]
             elif t == "cactus":   drops = [{"id":"fiber",    "qty":2}]
             elif t == "flower":   drops = [{"id":"herb",     "qty":1}]
-            del self.objs[(tx, ty)]
+            self._del_obj((tx, ty))
+            self._mark((tx, ty), None)
         return drops
 
     def add_drop(self, tx, ty, item):
@@ -163,3 +590,38 @@ class World:
 
     def pop_drops(self, tx, ty):
         return self.drops.pop((tx, ty), [])
+
+    # ── Delta — changes vs. the seeded world, kept up to date as they happen ──
+    def _mark(self, key, val):
+        self.delta.setdefault((key[0] >> CSHIFT, key[1] >> CSHIFT), {})[key] = val
+
+    def _placed(self, key):
+        return isinstance(self.delta.get((key[0] >> CSHIFT, key[1] >> CSHIFT), {}).get(key), dict)
+
+    def save(self):
+        """Seed + size + only what changed: O(changes), not O(map)"""
+        removed, damaged, placed = [], [], []
+        for cell in self.delta.values():
+            for (tx, ty), v in cell.items():
+                if v is None:             removed.append([tx, ty])
+                elif isinstance(v, dict): placed.append([tx, ty, v["type"], v["hp"], v["stage"]])
+                else:                     damaged.append([tx, ty, v])
+        return {
+            "seed": self.seed, "size": [self.W, self.H], "gen": GEN_VERSION,
+            "removed": removed, "damaged": damaged, "placed": placed,
+            "drops": [[tx, ty, d["id"], d["qty"]] for (tx, ty), ds in self.drops.items() for d in ds],
+        }
+
+    @classmethod
+    def from_save(cls, data):
+        """Generate from the seed, then apply the saved delta"""
+        w = cls(data["seed"], *data.get("size", (WORLD_W, WORLD_H)))
+        for tx, ty in data.get("removed", []):
+            w._mark((tx, ty), None)
+        for tx, ty, hp in data.get("damaged", []):
+            w._mark((tx, ty), hp)
+        for tx, ty, t, hp, st in data.get("placed", []):
+            w._mark((tx, ty), {"type":t, "hp":hp, "stage":st})
+        for tx, ty, iid, qty in data.get("drops", []):
+            w.add_drop(tx, ty, {"id":iid, "qty":qty})
+        return w
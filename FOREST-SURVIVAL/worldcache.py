@@ -0,0 +1,166 @@
+"""
+worldcache.py — cache chunk ที่สร้างแล้วลงดิสก์ (อ่านผ่าน mmap)
+
+One file per (seed, map size, chunk size, generator version). Each file is
+a header followed by append-only chunk records:
+
+    <iiH  cx, cy, n_objs
+    CHUNK*CHUNK bytes of tile ids
+    n_objs × <BBBBB  lx, ly, type, hp, stage
+
+Only the pristine generator output is stored; player changes live in the
+world delta. Files are evicted least-recently-used once the directory grows
+past the size cap.
+"""
+import mmap
+import os
+import struct
+import threading
+from config import CHUNK, WORLD_CACHE, WORLD_CACHE_MB
+
+MAGIC    = b"FSWC"
+_HEAD    = struct.Struct("<4sHH")     # magic, generator version, chunk size
+_REC     = struct.Struct("<iiH")
+_OBJ     = struct.Struct("<BBBBB")
+OBJ_TYPES = ("tree", "bush", "mushroom", "flower", "ore", "reed", "cactus")
+_OBJ_ID   = {t: i for i, t in enumerate(OBJ_TYPES)}
+
+
+class ChunkFile:
+    """Chunk records of one world, looked up through a read-only mmap"""
+
+    def __init__(self, path, gen_version):
+        self.path = path
+        self.gen_version = gen_version
+        self.index = {}       # (cx,cy) → offset of record
+        self._mm = None
+        self._lock = threading.Lock()
+        self._open()
+
+    def _open(self):
+        head = _HEAD.pack(MAGIC, self.gen_version, CHUNK)
+        if not os.path.exists(self.path) or os.path.getsize(self.path) < _HEAD.size:
+            with open(self.path, "wb") as f:
+                f.write(head)
+        else:
+            os.utime(self.path)             # mark as recently used
+        with open(self.path, "rb") as f:
+            if f.read(_HEAD.size) != head:
+                raise ValueError(f"{self.path}: header mismatch")
+        self._remap()
+        # Scan records; a torn tail (crash mid-write) is cut off
+        mm, off, end = self._mm, _HEAD.size, len(self._mm)
+        tb = CHUNK * CHUNK
+        while off + _REC.size <= end:
+            cx, cy, n = _REC.unpack_from(mm, off)
+            size = _REC.size + tb + n * _OBJ.size
+            if off + size > end: break
+            self.index[(cx, cy)] = off
+            off += size
+        if off < end:
+            self._mm.close(); self._mm = None
+            with open(self.path, "r+b") as f:
+                f.truncate(off)
+            self._remap()
+
+    def _remap(self):
+        if self._mm is not None: self._mm.close()
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def load(self, cx, cy):
+        """(tiles bytearray, [(lx,ly,type,hp,stage)]) or None"""
+        off = self.index.get((cx, cy))
+        if off is None: return None
+        with self._lock:
+            tb = CHUNK * CHUNK
+            if off + _REC.size + tb > len(self._mm):
+                self._remap()
+            mm = self._mm
+            _, _, n = _REC.unpack_from(mm, off)
+            o = off + _REC.size
+            tiles = bytearray(mm[o:o + tb]); o += tb
+            objs = []
+            for _ in range(n):
+                lx, ly, t, hp, st = _OBJ.unpack_from(mm, o); o += _OBJ.size
+                objs.append((lx, ly, OBJ_TYPES[t], hp, st))
+            return tiles, objs
+
+    def store(self, cx, cy, tiles, objs):
+        """Append a chunk record — skipped if another World sharing this file
+        (e.g. the loader thread) already stored the chunk"""
+        rec = bytearray(_REC.pack(cx, cy, len(objs)))
+        rec += tiles
+        for lx, ly, t, hp, st in objs:
+            rec += _OBJ.pack(lx, ly, _OBJ_ID[t], hp, st)
+        with self._lock:
+            if (cx, cy) in self.index: return
+            with open(self.path, "ab") as f:
+                off = f.tell()
+                f.write(rec)
+            self.index[(cx, cy)] = off
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close(); self._mm = None
+
+
+class WorldCache:
+    """Directory of ChunkFiles with an LRU size cap"""
+
+    def __init__(self, root=WORLD_CACHE, max_mb=WORLD_CACHE_MB):
+        self.root = root
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._open = {}       # path → [ChunkFile, refcount]
+        self._lock = threading.Lock()
+
+    def open(self, seed, w, h, gen_version):
+        """ChunkFile for this world (shared while open), or None if unusable"""
+        size = f"{w}x{h}" if w is not None else "inf"
+        path = os.path.join(self.root, f"w{seed}_{size}_c{CHUNK}_g{gen_version}.fsw")
+        with self._lock:
+            ent = self._open.get(path)
+            if ent is None:
+                try:
+                    os.makedirs(self.root, exist_ok=True)
+                    ent = self._open[path] = [ChunkFile(path, gen_version), 0]
+                except (OSError, ValueError) as e:
+                    print(f"[world cache] {e}")
+                    return None
+                self.evict()
+            ent[1] += 1
+            return ent[0]
+
+    def evict(self):
+        """Delete least-recently-used files until the directory fits the cap"""
+        try:
+            files = [os.path.join(self.root, n) for n in os.listdir(self.root) if n.endswith(".fsw")]
+            files = [(os.path.getmtime(p), os.path.getsize(p), p) for p in files]
+        except OSError:
+            return
+        total = sum(s for _, s, _ in files)
+        for _, s, p in sorted(files):
+            if total <= self.max_bytes: break
+            if p in self._open: continue
+            try:
+                os.remove(p); total -= s
+            except OSError:
+                pass
+
+    def release(self, cf):
+        with self._lock:
+            ent = self._open.get(cf.path)
+            if ent is None: return
+            ent[1] -= 1
+            if ent[1] <= 0:
+                del self._open[cf.path]
+                cf.close()
+
+
+_default = None
+
+def default_cache():
+    global _default
+    if _default is None:
+        _default = WorldCache()
+    return _default